@@ -1,8 +1,11 @@
-import oqs
-import time
+import os
+import sys
 import csv
-import matplotlib.pyplot as plt
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import kem_bench_core
+from kem_bench_core import check_oqs_build, load_raw_timings, save_raw_timings
+from kem_plot import generate_box_plot, generate_grouped_bar_chart
 
 # Define the KEM variants
 KEM_VARIANTS = {
@@ -13,129 +16,56 @@ KEM_VARIANTS = {
     ]
 }
 
-def benchmark_kem(variant, iterations=1000):
-    kem = oqs.KeyEncapsulation(variant)
-    keygen_times = []
-    encap_times = []
-    decap_times = []
-
-    for _ in range(iterations):
-        # Key generation benchmark
-        start = time.perf_counter()
-        public_key = kem.generate_keypair()
-        end = time.perf_counter()
-        keygen_times.append(end - start)
-
-        # Encapsulation benchmark
-        start = time.perf_counter()
-        ciphertext, shared_secret_enc = kem.encap_secret(public_key)
-        end = time.perf_counter()
-        encap_times.append(end - start)
+RAW_TIMINGS_FILE = "_BenchKYBER_raw.npz"  # Cached timing distributions for --plot-only
 
-        # Decapsulation benchmark
-        start = time.perf_counter()
-        shared_secret_dec = kem.decap_secret(ciphertext)
-        end = time.perf_counter()
-        decap_times.append(end - start)
+def main(plot_only=False):
+    benchmarks = {}     # Dictionary to hold full timing distributions for plotting.
+    iterations = 1000   # Number of iterations for benchmarking
+    jobs = [(family, variant) for family, variants in KEM_VARIANTS.items() for variant in variants]
 
-        # Verify that encapsulated and decapsulated secrets match
-        assert shared_secret_enc == shared_secret_dec, "Shared secrets do not match!"
-    
-    kem.free()
-    
-    return {
-        "keygen_times": keygen_times,
-        "encap_times": encap_times,
-        "decap_times": decap_times,
-        "keygen_avg": sum(keygen_times) / iterations,
-        "encap_avg": sum(encap_times) / iterations,
-        "decap_avg": sum(decap_times) / iterations,
-    }
+    if plot_only:
+        # Reuse the cached timing distributions instead of rerunning the benchmarks.
+        benchmarks = load_raw_timings(RAW_TIMINGS_FILE)
+    else:
+        check_oqs_build()
 
-def generate_grouped_bar_chart(results):
-    """
-    Generates a grouped bar chart comparing the average times for key generation,
-    encapsulation, and decapsulation for each KEM variant.
-    """
-    # Unpack the results
-    variants = [row[0] for row in results]
-    keygen_avg = [row[2] for row in results]
-    encap_avg = [row[3] for row in results]
-    decap_avg = [row[4] for row in results]
-    
-    x = np.arange(len(variants))
-    width = 0.2
+        # Run benchmarks for each KEM variant, one worker process pinned per core.
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+        with ProcessPoolExecutor(max_workers=min(len(jobs), len(cores))) as ex:
+            futures = {}
+            for idx, (family, variant) in enumerate(jobs):
+                print(f"Benchmarking {variant} ({family})...")
+                futures[ex.submit(kem_bench_core.run, variant, iterations, cores[idx % len(cores)])] = variant
+            for future in as_completed(futures):
+                benchmarks[futures[future]] = future.result()
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.bar(x - width, keygen_avg, width, label='KeyGen')
-    ax.bar(x, encap_avg, width, label='Encap')
-    ax.bar(x + width, decap_avg, width, label='Decap')
-    
-    ax.set_ylabel('Time (s)')
-    ax.set_title('Average KEM Operation Times')
-    ax.set_xticks(x)
-    ax.set_xticklabels(variants)
-    ax.legend()
-    
-    plt.tight_layout()
-    plt.savefig("kem_grouped_bar_chart.png")
-    plt.show()
+    # Keep the report in KEM_VARIANTS order regardless of completion order.
+    jobs = [(family, variant) for family, variant in jobs if variant in benchmarks]
+    results = [None] * len(jobs)
+    for idx, (family, variant) in enumerate(jobs):
+        result = benchmarks[variant]
+        results[idx] = [variant, family, result["keygen_avg"], result["encap_avg"], result["decap_avg"]]
+    benchmarks = {variant: benchmarks[variant] for _, variant in jobs}
 
-def generate_box_plot(benchmarks):
-    """
-    Generates box plots for the full distribution of times for key generation,
-    encapsulation, and decapsulation across KEM variants.
-    """
-    variants = list(benchmarks.keys())
-    keygen_data = [benchmarks[variant]["keygen_times"] for variant in variants]
-    encap_data = [benchmarks[variant]["encap_times"] for variant in variants]
-    decap_data = [benchmarks[variant]["decap_times"] for variant in variants]
-    
-    fig, axs = plt.subplots(1, 3, figsize=(18, 6))
-    
-    # Box plot for key generation times
-    axs[0].boxplot(keygen_data, labels=variants)
-    axs[0].set_title("Key Generation Times")
-    axs[0].set_ylabel("Time (s)")
-    
-    # Box plot for encapsulation times
-    axs[1].boxplot(encap_data, labels=variants)
-    axs[1].set_title("Encapsulation Times")
-    
-    # Box plot for decapsulation times
-    axs[2].boxplot(decap_data, labels=variants)
-    axs[2].set_title("Decapsulation Times")
-    
-    plt.suptitle("Distribution of KEM Operation Times over 1000 Iterations")
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.savefig("kem_box_plots.png")
-    plt.show()
-
-def main():
-    results = []        # List to hold average time results for CSV/text output.
-    benchmarks = {}     # Dictionary to hold full timing distributions for plotting.
-    iterations = 1000   # Number of iterations for benchmarking
-    
-    # Run benchmarks for each KEM variant.
-    for family, variants in KEM_VARIANTS.items():
-        for variant in variants:
-            print(f"Benchmarking {variant} ({family})...")
-            result = benchmark_kem(variant, iterations)
-            benchmarks[variant] = result
-            results.append([variant, family, result["keygen_avg"], result["encap_avg"], result["decap_avg"]])
+    if not plot_only:
+        save_raw_timings(benchmarks, RAW_TIMINGS_FILE)
     
     # Write average results to CSV.
-    with open("_BenchKYBER.csv", "w", newline="") as f:
-        writer = csv.writer(f)
+    # Rows are preformatted strings, so the writer can stream them without quoting checks.
+    rows = [[variant, family, f"{keygen:.9g}", f"{encap:.9g}", f"{decap:.9g}"]
+            for variant, family, keygen, encap, decap in results]
+    with open("_BenchKYBER.csv", "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f, dialect='unix', quoting=csv.QUOTE_NONE)
         writer.writerow(["KEM Variant", "Family", "KeyGen Time (s)", "Encap Time (s)", "Decap Time (s)"])
-        writer.writerows(results)
+        writer.writerows(rows)
     
     # Write average results to text file.
-    with open("_BenchKYBER.txt", "w") as f:
-        f.write("KEM Variant | Family | KeyGen Time (s) | Encap Time (s) | Decap Time (s)\n")
-        f.write("-" * 70 + "\n")
-        for row in results:
-            f.write(f"{row[0]} | {row[1]} | {row[2]:.6f} | {row[3]:.6f} | {row[4]:.6f}\n")
+    report = "\n".join(
+        ["KEM Variant | Family | KeyGen Time (s) | Encap Time (s) | Decap Time (s)", "-" * 70]
+        + [f"{row[0]} | {row[1]} | {row[2]:.6f} | {row[3]:.6f} | {row[4]:.6f}" for row in results]
+    )
+    with open("_BenchKYBER.txt", "w", buffering=1 << 20) as f:
+        f.write(report + "\n")
     
     print("Benchmark completed. Results saved to _BenchKYBER.csv and _BenchKYBER.txt")
     
@@ -144,4 +74,4 @@ def main():
     generate_box_plot(benchmarks)
 
 if __name__ == "__main__":
-    main()
+    main(plot_only="--plot-only" in sys.argv)
@@ -1,8 +1,22 @@
+import os
 import re
 import csv
+import numpy as np
 import pandas as pd
+import matplotlib
+if not os.environ.get("BENCH_INTERACTIVE"):
+    matplotlib.use("Agg")  # Batch runs only write files; set BENCH_INTERACTIVE=1 to show plots
 import matplotlib.pyplot as plt
 
+# Single precompiled pattern so each file is scanned once for all four fields
+BENCHMARK_PATTERN = re.compile(
+    r"Variant:\s*(\S+)"
+    r".*?Average times key_pair \(seconds\):\s*([\d\.]+)"
+    r".*?Average times enc \(seconds\):\s*([\d\.]+)"
+    r".*?Average times dec \(seconds\):\s*([\d\.]+)",
+    re.DOTALL,
+)
+
 def parse_benchmark_file(filename):
     """
     Parse the given benchmark text file to extract:
@@ -14,16 +28,12 @@ def parse_benchmark_file(filename):
     with open(filename, 'r') as f:
         content = f.read()
 
-    # Use regex to extract required values
-    variant_match = re.search(r"Variant:\s*(\S+)", content)
-    keygen_match = re.search(r"Average times key_pair \(seconds\):\s*([\d\.]+)", content)
-    encap_match = re.search(r"Average times enc \(seconds\):\s*([\d\.]+)", content)
-    decap_match = re.search(r"Average times dec \(seconds\):\s*([\d\.]+)", content)
-    
-    variant = variant_match.group(1) if variant_match else "Unknown"
-    keygen = float(keygen_match.group(1)) if keygen_match else None
-    encap = float(encap_match.group(1)) if encap_match else None
-    decap = float(decap_match.group(1)) if decap_match else None
+    match = BENCHMARK_PATTERN.search(content)
+    if match:
+        variant = match.group(1)
+        keygen, encap, decap = (float(match.group(i)) for i in (2, 3, 4))
+    else:
+        variant, keygen, encap, decap = "Unknown", None, None, None
 
     return {
         "KEM Variant": variant,
@@ -54,19 +64,24 @@ def plot_results(csv_filename):
     df.set_index("KEM Variant", inplace=True)
     
     # Create the bar chart for the times in seconds
-    plt.figure(figsize=(3.15, 2.1))
-    df[["KeyGen Time (s)", "Encap Time (s)", "Decap Time (s)"]].plot(kind='bar', figsize=(12,6))
-    plt.title("KEM Benchmark Results")
-    plt.ylabel("Time (s)")
-    plt.xticks(rotation=45, ha='right')
-    plt.legend()
-    plt.grid(axis='y')
-    plt.tight_layout()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    x = np.arange(len(df))
+    width = 0.25
+    ax.bar(x - width, df["KeyGen Time (s)"].to_numpy(dtype=np.float32), width, label='KeyGen')
+    ax.bar(x, df["Encap Time (s)"].to_numpy(dtype=np.float32), width, label='Encap')
+    ax.bar(x + width, df["Decap Time (s)"].to_numpy(dtype=np.float32), width, label='Decap')
+    ax.set_xticks(x)
+    ax.set_xticklabels(df.index, rotation=45, ha='right')
+    ax.set_title("KEM Benchmark Results")
+    ax.set_ylabel("Time (s)")
+    ax.legend()
+    ax.grid(axis='y')
     
     # Save the plot as an EPS file
     eps_filename = '_BenchSABER.eps'
-    plt.savefig(eps_filename, format='eps', dpi=600)
-    plt.show()
+    fig.savefig(eps_filename, format='eps', bbox_inches='tight', dpi=150)
+    if os.environ.get("BENCH_INTERACTIVE"):
+        plt.show()
     print(f"Plot saved as '{eps_filename}'.")
 
 plot_results(csv_filename)
@@ -1,6 +1,9 @@
-import oqs
-import time
+import os
 import csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import kem_bench_core
+from kem_bench_core import check_oqs_build, save_raw_timings
 
 KEM_VARIANTS = {
     "Kyber": [
@@ -21,56 +24,35 @@ KEM_VARIANTS = {
     ]
 }
 
-def benchmark_kem(variant, iterations=1000):
-    kem = oqs.KeyEncapsulation(variant)
-    keygen_times = []
-    encap_times = []
-    decap_times = []
-
-    for _ in range(iterations):
-        # Key generation benchmark
-        start = time.perf_counter()
-        public_key = kem.generate_keypair()
-        end = time.perf_counter()
-        keygen_times.append(end - start)
-
-        # Encapsulation benchmark
-        start = time.perf_counter()
-        ciphertext, shared_secret_enc = kem.encap_secret(public_key)
-        end = time.perf_counter()
-        encap_times.append(end - start)
-
-        # Decapsulation benchmark
-        start = time.perf_counter()
-        shared_secret_dec = kem.decap_secret(ciphertext)
-        end = time.perf_counter()
-        decap_times.append(end - start)
-
-        assert shared_secret_enc == shared_secret_dec, "Shared secrets do not match!"
-    
-    kem.free()
-    
-    return {
-        "keygen_avg": sum(keygen_times) / iterations,
-        "encap_avg": sum(encap_times) / iterations,
-        "decap_avg": sum(decap_times) / iterations,
-    }
+RAW_TIMINGS_FILE = "_kem_benchmark_raw.npz"  # Full timing distributions, for redrawing plots
 
 def main():
-    results = []
     iterations = 1000  # Adjust for more or fewer iterations
     
-    for family, variants in KEM_VARIANTS.items():
-        for variant in variants:
+    check_oqs_build()
+    # One worker process pinned per core; each variant is independent.
+    jobs = [(family, variant) for family, variants in KEM_VARIANTS.items() for variant in variants]
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    benchmarks = {}
+    with ProcessPoolExecutor(max_workers=min(len(jobs), len(cores))) as ex:
+        futures = {}
+        for idx, (family, variant) in enumerate(jobs):
             print(f"Benchmarking {variant} ({family})...")
-            result = benchmark_kem(variant, iterations)
-            results.append([variant, family, result["keygen_avg"], result["encap_avg"], result["decap_avg"]])
+            futures[ex.submit(kem_bench_core.run, variant, iterations, cores[idx % len(cores)])] = variant
+        for future in as_completed(futures):
+            benchmarks[futures[future]] = future.result()
+
+    # Keep the report in KEM_VARIANTS order regardless of completion order.
+    benchmarks = {variant: benchmarks[variant] for _, variant in jobs}
+    save_raw_timings(benchmarks, RAW_TIMINGS_FILE)
+    results = [[variant, family, benchmarks[variant]["keygen_avg"], benchmarks[variant]["encap_avg"],
+                benchmarks[variant]["decap_avg"]] for family, variant in jobs]
     
     # Write results to CSV
     with open("_kem_benchmark_results.csv", "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow(["KEM Variant", "Family", "KeyGen Time (s)", "Encap Time (s)", "Decap Time (s)"])
-        writer.writerows(results)
+        writer.writerows([row[0], row[1]] + [f"{x:.9g}" for x in row[2:]] for row in results)
     
     # Write results to text file
     with open("_kem_benchmark_results.txt", "w") as f:
@@ -79,7 +61,7 @@ def main():
         for row in results:
             f.write(f"{row[0]} | {row[1]} | {row[2]:.6f} | {row[3]:.6f} | {row[4]:.6f}\n")
     
-    print("Benchmark completed. Results saved to kem_benchmark_results.csv and kem_benchmark_results.txt")
+    print("Benchmark completed. Results saved to _kem_benchmark_results.csv and _kem_benchmark_results.txt")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
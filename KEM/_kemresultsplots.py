@@ -1,42 +1,31 @@
 import csv
+import os
+import matplotlib
+if not os.environ.get("BENCH_INTERACTIVE"):
+    matplotlib.use("Agg")  # Batch runs only write files; set BENCH_INTERACTIVE=1 to show plots
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+TIME_COLUMNS = ["KeyGen Time (s)", "Encap Time (s)", "Decap Time (s)"]
+
 def plot_results(csv_filename):
-    df = pd.read_csv(csv_filename)
+    # Timings only need single precision for plotting.
+    df = pd.read_csv(csv_filename, dtype={col: np.float32 for col in TIME_COLUMNS})
     df.set_index("KEM Variant", inplace=True)
     
-    # Plot KeyGen times
-    plt.figure(figsize=(12, 6))
-    df["KeyGen Time (s)"].plot(kind='bar', color='blue')
-    plt.title("KeyGen Benchmark Results")
-    plt.ylabel("Time (s)")
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y')
-    plt.tight_layout()
-    plt.savefig("keygen_benchmark_results.png")
-    plt.show()
-    
-    # Plot Encap times
-    plt.figure(figsize=(12, 6))
-    df["Encap Time (s)"].plot(kind='bar', color='green')
-    plt.title("Encap Benchmark Results")
-    plt.ylabel("Time (s)")
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y')
-    plt.tight_layout()
-    plt.savefig("encap_benchmark_results.png")
-    plt.show()
-    
-    # Plot Decap times
-    plt.figure(figsize=(12, 6))
-    df["Decap Time (s)"].plot(kind='bar', color='red')
-    plt.title("Decap Benchmark Results")
-    plt.ylabel("Time (s)")
-    plt.xticks(rotation=45, ha='right')
-    plt.grid(axis='y')
-    plt.tight_layout()
-    plt.savefig("decap_benchmark_results.png")
-    plt.show()
+    # Plot KeyGen, Encap and Decap times side by side on a single figure
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6), sharey=False)
+    df[TIME_COLUMNS].plot(kind='bar', subplots=True, ax=axes, legend=False, color=['blue', 'green', 'red'])
+    for ax, title in zip(axes, ["KeyGen", "Encap", "Decap"]):
+        ax.set_title(f"{title} Benchmark Results")
+        ax.set_ylabel("Time (s)")
+        ax.tick_params(axis='x', labelrotation=45)
+        for label in ax.get_xticklabels():
+            label.set_ha('right')
+        ax.grid(axis='y')
+    fig.savefig("kem_results_subplots.png", bbox_inches='tight', dpi=150)
+    if os.environ.get("BENCH_INTERACTIVE"):
+        plt.show()
 
-plot_results("_kem_benchmark_results.csv")
\ No newline at end of file
+plot_results("_kem_benchmark_results.csv")
@@ -15,17 +15,20 @@ def alice_server():
     alice, alice_public_key = key_encapsulation()
 
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_socket.bind(('localhost', 65432))
     server_socket.listen()
 
     print("Server listening on port 65432...")
     conn, addr = server_socket.accept()
+    # Disable Nagle so the small handshake messages aren't held back by delayed ACKs
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     with conn:
         print(f"Connected by {addr}")
         # Send Alice's public key to Bob
-        conn.sendall(alice_public_key)
-        # Receive the ciphertext from Bob
-        received_ciphertext = conn.recv(1152)
+        conn.sendall(memoryview(alice_public_key))
+        # Receive the full ciphertext from Bob in one call
+        received_ciphertext = conn.recv(alice.details["length_ciphertext"], socket.MSG_WAITALL)
 
         # Decapsulate the ciphertext to get the shared key
         shared_key_alice = key_decapsulation(alice, received_ciphertext)
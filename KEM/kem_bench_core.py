@@ -0,0 +1,105 @@
+import os
+# Keep liboqs single-threaded so the timed NTT runs aren't split across cores.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+import oqs
+import time
+import numpy as np
+
+try:
+    # Cython timing loop calling liboqs directly; build with `python setup.py build_ext --inplace`.
+    import kem_bench
+except ImportError:
+    kem_bench = None
+
+OPERATIONS = ("keygen", "encap", "decap")
+
+def pin_to_core(core=0):
+    """
+    Pins the current process to a single core so timings aren't polluted by
+    the scheduler migrating the benchmark between CPUs (Linux only).
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+
+def check_oqs_build():
+    """
+    Prints the liboqs build being benchmarked. The AVX2 Kyber code path is only
+    available when liboqs was built with e.g.
+        cmake -DOQS_DIST_BUILD=ON -DOQS_OPT_TARGET=haswell ..
+    so record the version alongside the results.
+    """
+    print(f"liboqs version: {oqs.oqs_version()}, liboqs-python version: {oqs.oqs_python_version()}")
+
+def run(variant, iterations=1000, core=0):
+    """
+    Benchmarks keygen/encap/decap for one liboqs KEM variant, pinned to `core`.
+    Returns summarize_timings() of the per-op timings in seconds.
+    """
+    pin_to_core(core)
+    if kem_bench is not None:
+        keygen_times, encap_times, decap_times = kem_bench.bench(variant, iterations)
+    else:
+        # Preallocated perf_counter_ns deltas; converted to seconds once after the loop.
+        keygen_ns = np.empty(iterations, dtype=np.int64)
+        encap_ns = np.empty(iterations, dtype=np.int64)
+        decap_ns = np.empty(iterations, dtype=np.int64)
+
+        with oqs.KeyEncapsulation(variant) as kem:
+            # Bind the hot-loop callables locally to skip attribute lookups per iteration
+            gen = kem.generate_keypair
+            enc = kem.encap_secret
+            dec = kem.decap_secret
+            perf = time.perf_counter_ns
+            for i in range(iterations):
+                # Key generation benchmark
+                start = perf()
+                public_key = gen()
+                keygen_ns[i] = perf() - start
+
+                # Encapsulation benchmark
+                start = perf()
+                ciphertext, shared_secret_enc = enc(public_key)
+                encap_ns[i] = perf() - start
+
+                # Decapsulation benchmark
+                start = perf()
+                shared_secret_dec = dec(ciphertext)
+                decap_ns[i] = perf() - start
+
+                # Verify that encapsulated and decapsulated secrets match
+                assert shared_secret_enc == shared_secret_dec, "Shared secrets do not match!"
+
+        keygen_times = keygen_ns / 1e9
+        encap_times = encap_ns / 1e9
+        decap_times = decap_ns / 1e9
+
+    return summarize_timings(keygen_times, encap_times, decap_times)
+
+def summarize_timings(keygen_times, encap_times, decap_times):
+    """
+    Bundles the raw per-op timings (seconds) with their mean, std and percentiles.
+    """
+    result = {}
+    for name, times in zip(OPERATIONS, (keygen_times, encap_times, decap_times)):
+        result[f"{name}_times"] = times
+        result[f"{name}_avg"] = times.mean()
+        result[f"{name}_std"] = times.std()
+        result[f"{name}_p50"], result[f"{name}_p95"], result[f"{name}_p99"] = np.percentile(times, [50, 95, 99])
+    return result
+
+def save_raw_timings(benchmarks, filename):
+    """
+    Caches the full timing distributions so plots can be redrawn without rerunning.
+    """
+    np.savez_compressed(filename, **{f"{variant}_{op}": benchmarks[variant][f"{op}_times"]
+                                     for variant in benchmarks for op in OPERATIONS})
+
+def load_raw_timings(filename):
+    """
+    Rebuilds the benchmarks dictionary from a cache written by save_raw_timings.
+    """
+    with np.load(filename) as data:
+        variants = dict.fromkeys(key.rsplit("_", 1)[0] for key in data.files)
+        return {variant: summarize_timings(*(data[f"{variant}_{op}"] for op in OPERATIONS))
+                for variant in variants}
@@ -0,0 +1,69 @@
+import os
+import matplotlib
+if not os.environ.get("BENCH_INTERACTIVE"):
+    matplotlib.use("Agg")  # Batch runs only write files; set BENCH_INTERACTIVE=1 to show plots
+import matplotlib.pyplot as plt
+import numpy as np
+
+def generate_grouped_bar_chart(results):
+    """
+    Generates a grouped bar chart comparing the average times for key generation,
+    encapsulation, and decapsulation for each KEM variant.
+    """
+    # Unpack the results by slicing columns of the results matrix
+    arr = np.array(results, dtype=object)
+    variants = arr[:, 0]
+    keygen_avg, encap_avg, decap_avg = arr[:, 2:5].astype(np.float64).T
+    
+    x = np.arange(len(variants))
+    width = 0.2
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(x - width, keygen_avg, width, label='KeyGen')
+    ax.bar(x, encap_avg, width, label='Encap')
+    ax.bar(x + width, decap_avg, width, label='Decap')
+    
+    ax.set_ylabel('Time (s)')
+    ax.set_title('Average KEM Operation Times')
+    ax.set_xticks(x)
+    ax.set_xticklabels(variants)
+    ax.legend()
+    
+    fig.savefig("kem_grouped_bar_chart.png", bbox_inches='tight', dpi=150)
+    if os.environ.get("BENCH_INTERACTIVE"):
+        plt.show()
+
+def generate_box_plot(benchmarks):
+    """
+    Generates box plots for the full distribution of times for key generation,
+    encapsulation, and decapsulation across KEM variants.
+    """
+    variants = list(benchmarks.keys())
+    keygen_data = [benchmarks[variant]["keygen_times"] for variant in variants]
+    encap_data = [benchmarks[variant]["encap_times"] for variant in variants]
+    decap_data = [benchmarks[variant]["decap_times"] for variant in variants]
+    
+    # Timings are already float64 ndarrays; small fliers keep 1000-point outlier tails cheap to draw
+    positions = np.arange(1, len(variants) + 1)
+    boxplot_kwargs = dict(labels=variants, positions=positions, vert=True,
+                          flierprops=dict(marker='.', markersize=2), showfliers=True)
+    
+    fig, axs = plt.subplots(1, 3, figsize=(18, 6))
+    
+    # Box plot for key generation times
+    axs[0].boxplot(keygen_data, **boxplot_kwargs)
+    axs[0].set_title("Key Generation Times")
+    axs[0].set_ylabel("Time (s)")
+    
+    # Box plot for encapsulation times
+    axs[1].boxplot(encap_data, **boxplot_kwargs)
+    axs[1].set_title("Encapsulation Times")
+    
+    # Box plot for decapsulation times
+    axs[2].boxplot(decap_data, **boxplot_kwargs)
+    axs[2].set_title("Decapsulation Times")
+    
+    plt.suptitle("Distribution of KEM Operation Times over 1000 Iterations")
+    fig.savefig("kem_box_plots.png", bbox_inches='tight', dpi=150)
+    if os.environ.get("BENCH_INTERACTIVE"):
+        plt.show()
@@ -0,0 +1,15 @@
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+# Builds the kem_bench timing loop used by kem_bench_core.py:
+#     python setup.py build_ext --inplace
+extensions = [
+    Extension(
+        "kem_bench",
+        ["kem_bench.pyx"],
+        libraries=["oqs"],
+        extra_compile_args=["-O3", "-march=native"],
+    )
+]
+
+setup(name="kem_bench", ext_modules=cythonize(extensions))
@@ -1,11 +1,28 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib
 matplotlib.use("Agg")  # Fixes renderer issue
 import matplotlib.pyplot as plt
+plt.ioff()
 from PIL import Image  # To load images
+import numpy as np
 from qiskit import QuantumCircuit, Aer, transpile
 from qiskit.visualization import plot_bloch_multivector
 from qiskit.providers.aer import AerSimulator
 
+matplotlib.rcParams['path.simplify_threshold'] = 1.0  # Simplify Bloch sphere paths
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+PREVIEW_DPI = 150  # Individual circuit / Bloch sphere images
+FINAL_DPI = 300    # Combined grids
+
+def save_figure(fig, filename):
+    """
+    Save a figure as PNG at preview DPI. Only the figure's own canvas is used and PNG
+    compression releases the GIL, so this runs on a thread pool; pyplot's figure
+    manager isn't thread-safe, so closing the figure is left to the main thread.
+    """
+    fig.savefig(filename, format="png", dpi=PREVIEW_DPI, pil_kwargs={"optimize": True})
+
 def create_bb84_circuit(bit, base):
     """
     Create a BB84 quantum circuit based on a given bit (0/1) and basis (Z/X).
@@ -44,42 +61,66 @@ def save_bb84_visuals():
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
     simulator = AerSimulator()
 
-    for bit, alice_base in test_cases:
-        for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
-            tag = f"{bit}_{alice_base}_to_{bob_base}"
-
-            # Step 1: Alice's Circuit
-            qc_alice = create_bb84_circuit(bit, alice_base)
-            fig_circuit_alice = qc_alice.draw(output='mpl')
-            fig_circuit_alice.savefig(f"alice_circuit_{tag}.png", format="png", dpi=600)
-            plt.close(fig_circuit_alice)
-            print(f"Saved Alice's circuit as alice_circuit_{tag}.png")
-
-            # Step 2: Simulate Alice's state before measurement
-            qc_alice.save_statevector()
-            compiled_circuit = transpile(qc_alice, simulator)
-            result = simulator.run(compiled_circuit).result()
-            statevector = result.get_statevector()
+    # Simulation stays serial; PNG encoding of the figures is queued on a thread pool
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        pending = []  # (future, figure, message) for every queued save
+        tags = []
+        alice_circuits = []
+        bob_circuits = []
+        for bit, alice_base in test_cases:
+            for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
+                tag = f"{bit}_{alice_base}_to_{bob_base}"
+
+                # Step 1: Alice's Circuit
+                qc_alice = create_bb84_circuit(bit, alice_base)
+                fig_circuit_alice = qc_alice.draw(output='mpl')
+                pending.append((pool.submit(save_figure, fig_circuit_alice, f"alice_circuit_{tag}.png"),
+                                fig_circuit_alice, f"Saved Alice's circuit as alice_circuit_{tag}.png"))
+
+                # Step 2: Save Alice's state before measurement
+                qc_alice.save_statevector()
+
+                # Step 3: Bob's Measurement Circuit
+                qc_bob = create_bob_measurement(qc_alice, bob_base)
+                fig_circuit_bob = qc_bob.draw(output='mpl')
+                pending.append((pool.submit(save_figure, fig_circuit_bob, f"bob_circuit_{tag}.png"),
+                                fig_circuit_bob, f"Saved Bob's circuit as bob_circuit_{tag}.png"))
+
+                tags.append(tag)
+                alice_circuits.append(qc_alice)
+                bob_circuits.append(qc_bob)
+
+        # Step 4: Transpile and simulate every Alice and Bob circuit in one batch
+        compiled_circuits = transpile(alice_circuits + bob_circuits, simulator, optimization_level=0)
+        result = simulator.run(compiled_circuits).result()
+
+        for i, tag in enumerate(tags):
+            statevector = result.get_statevector(i)
             fig_bloch_alice = plot_bloch_multivector(statevector)
-            fig_bloch_alice.savefig(f"alice_bloch_{tag}.png", format="png", dpi=600)
-            plt.close(fig_bloch_alice)
-            print(f"Saved Alice's Bloch sphere as alice_bloch_{tag}.png")
-
-            # Step 3: Bob's Measurement Circuit
-            qc_bob = create_bob_measurement(qc_alice, bob_base)
-            fig_circuit_bob = qc_bob.draw(output='mpl')
-            fig_circuit_bob.savefig(f"bob_circuit_{tag}.png", format="png", dpi=600)
-            plt.close(fig_circuit_bob)
-            print(f"Saved Bob's circuit as bob_circuit_{tag}.png")
-
-            # Step 4: Simulate Bob's state after measurement
-            compiled_circuit_bob = transpile(qc_bob, simulator)
-            result_bob = simulator.run(compiled_circuit_bob).result()
-            statevector_bob = result_bob.get_statevector()
+            pending.append((pool.submit(save_figure, fig_bloch_alice, f"alice_bloch_{tag}.png"),
+                            fig_bloch_alice, f"Saved Alice's Bloch sphere as alice_bloch_{tag}.png"))
+
+            statevector_bob = result.get_statevector(len(tags) + i)
             fig_bloch_bob = plot_bloch_multivector(statevector_bob)
-            fig_bloch_bob.savefig(f"bob_bloch_{tag}.png", format="png", dpi=600)
-            plt.close(fig_bloch_bob)
-            print(f"Saved Bob's Bloch sphere as bob_bloch_{tag}.png")
+            pending.append((pool.submit(save_figure, fig_bloch_bob, f"bob_bloch_{tag}.png"),
+                            fig_bloch_bob, f"Saved Bob's Bloch sphere as bob_bloch_{tag}.png"))
+
+        # Close each figure and report it only once its file has been written
+        for future, fig, message in pending:
+            future.result()
+            plt.close(fig)  # Close figure to prevent memory leak
+            print(message)
+
+GRID_THUMBNAIL_SIZE = (1200, 1200)  # Grid cells are far smaller than the source PNGs
+
+def load_thumbnail(path):
+    """
+    Load an image downscaled to grid size instead of decoding it at full resolution.
+    """
+    img = Image.open(path)
+    img.draft("RGB", GRID_THUMBNAIL_SIZE)  # Only takes effect for JPEG sources
+    img.thumbnail(GRID_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(img)
 
 def visualize_grid(image_type, title):
     """
@@ -94,7 +135,7 @@ def visualize_grid(image_type, title):
         bob_base = 'Z'  # Assuming Bob measures in Z basis for simplicity
         tag = f"{bit}_{alice_base}_to_{bob_base}"
 
-        img = Image.open(f"{image_type}_{tag}.png")
+        img = load_thumbnail(f"{image_type}_{tag}.png")
         row, col = divmod(i, 2)
         axes[row, col].imshow(img)
         axes[row, col].axis("off")
@@ -103,7 +144,7 @@ def visualize_grid(image_type, title):
     plt.tight_layout()
     plt.subplots_adjust(top=0.9)
     output_filename = f"bb84_{image_type}_grid.png"
-    plt.savefig(output_filename, dpi=600)
+    plt.savefig(output_filename, dpi=FINAL_DPI, pil_kwargs={"optimize": True})
     plt.show()
     print(f"Saved {image_type} grid as {output_filename}")
 
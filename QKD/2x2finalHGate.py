@@ -1,11 +1,28 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib
 matplotlib.use("Agg")  # Fixes the renderer issue
 import matplotlib.pyplot as plt
+plt.ioff()
 from PIL import Image  # To load images
+import numpy as np
 from qiskit import QuantumCircuit, Aer, transpile
 from qiskit.visualization import plot_bloch_multivector
 from qiskit.providers.aer import AerSimulator
 
+matplotlib.rcParams['path.simplify_threshold'] = 1.0  # Simplify Bloch sphere paths
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+PREVIEW_DPI = 150  # Individual circuit / Bloch sphere images
+FINAL_DPI = 300    # Combined grids
+
+def save_figure(fig, filename):
+    """
+    Save a figure as PNG at preview DPI. Only the figure's own canvas is used and PNG
+    compression releases the GIL, so this runs on a thread pool; pyplot's figure
+    manager isn't thread-safe, so closing the figure is left to the main thread.
+    """
+    fig.savefig(filename, format="png", dpi=PREVIEW_DPI, pil_kwargs={"optimize": True})
+
 def create_bb84_circuit(bit, base):
     """
     Create a BB84 quantum circuit based on a given bit (0/1) and basis (Z/X).
@@ -31,27 +48,51 @@ def save_bb84_visuals():
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
     simulator = AerSimulator()
 
-    for bit, base in test_cases:
-        qc = create_bb84_circuit(bit, base)
+    # Simulation stays serial; PNG encoding of the figures is queued on a thread pool
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        pending = []  # (future, figure, message) for every queued save
+        circuits = []
+        for bit, base in test_cases:
+            qc = create_bb84_circuit(bit, base)
+
+            # Save Circuit Diagram as PNG
+            circuit_filename = f"circuit_{bit}_{base}.png"
+            fig_circuit = qc.draw(output='mpl')  # Matplotlib-based drawing
+            pending.append((pool.submit(save_figure, fig_circuit, circuit_filename),
+                            fig_circuit, f"Saved circuit diagram as {circuit_filename}"))
+
+            qc.save_statevector()  # Save quantum state
+            circuits.append(qc)
 
-        # Save Circuit Diagram as PNG
-        circuit_filename = f"circuit_{bit}_{base}.png"
-        fig_circuit = qc.draw(output='mpl')  # Matplotlib-based drawing
-        fig_circuit.savefig(circuit_filename, format="png", dpi=600)
-        plt.close(fig_circuit)  # Close figure to prevent memory leak
-        print(f"Saved circuit diagram as {circuit_filename}")
+        # Transpile and simulate all circuits in one batch
+        compiled_circuits = transpile(circuits, simulator, optimization_level=0)
+        result = simulator.run(compiled_circuits).result()
 
-        # Simulate and Save Bloch Sphere as PNG
-        qc.save_statevector()  # Save quantum state
-        compiled_circuit = transpile(qc, simulator)
-        result = simulator.run(compiled_circuit).result()
-        statevector = result.get_statevector()
+        for i, (bit, base) in enumerate(test_cases):
+            # Save Bloch Sphere as PNG
+            statevector = result.get_statevector(i)
 
-        bloch_filename = f"bloch_{bit}_{base}.png"
-        fig_bloch = plot_bloch_multivector(statevector)
-        fig_bloch.savefig(bloch_filename, format="png", dpi=600)
-        plt.close(fig_bloch)  # Close figure to prevent memory leak
-        print(f"Saved Bloch sphere as {bloch_filename}")
+            bloch_filename = f"bloch_{bit}_{base}.png"
+            fig_bloch = plot_bloch_multivector(statevector)
+            pending.append((pool.submit(save_figure, fig_bloch, bloch_filename),
+                            fig_bloch, f"Saved Bloch sphere as {bloch_filename}"))
+
+        # Close each figure and report it only once its file has been written
+        for future, fig, message in pending:
+            future.result()
+            plt.close(fig)  # Close figure to prevent memory leak
+            print(message)
+
+GRID_THUMBNAIL_SIZE = (1200, 1200)  # Grid cells are far smaller than the source PNGs
+
+def load_thumbnail(path):
+    """
+    Load an image downscaled to grid size instead of decoding it at full resolution.
+    """
+    img = Image.open(path)
+    img.draft("RGB", GRID_THUMBNAIL_SIZE)  # Only takes effect for JPEG sources
+    img.thumbnail(GRID_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(img)
 
 def visualize_grid(image_type):
     """
@@ -64,7 +105,7 @@ def visualize_grid(image_type):
 
     for i, (bit, base) in enumerate(test_cases):
         row, col = divmod(i, 2)  # Determine grid position
-        img = Image.open(f"{image_type}_{bit}_{base}.png")
+        img = load_thumbnail(f"{image_type}_{bit}_{base}.png")
 
         axes[row, col].imshow(img)
         axes[row, col].axis("off")
@@ -73,7 +114,7 @@ def visualize_grid(image_type):
     plt.tight_layout()
     plt.subplots_adjust(top=0.9)  # Adjust title spacing
     output_filename = f"bb84_{image_type}_grid.png"
-    plt.savefig(output_filename, dpi=600)  # Save the combined grid as PNG
+    plt.savefig(output_filename, dpi=FINAL_DPI, pil_kwargs={"optimize": True})  # Save the combined grid as PNG
     plt.show()
     print(f"Saved {image_type} grid as {output_filename}")
 
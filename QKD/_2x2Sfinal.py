@@ -1,11 +1,28 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib
 matplotlib.use("Agg")  # Fixes renderer issue
 import matplotlib.pyplot as plt
+plt.ioff()
 from PIL import Image  # To load images
+import numpy as np
 from qiskit import QuantumCircuit, Aer, transpile
 from qiskit.visualization import plot_bloch_multivector
 from qiskit.providers.aer import AerSimulator
 
+matplotlib.rcParams['path.simplify_threshold'] = 1.0  # Simplify Bloch sphere paths
+matplotlib.rcParams['agg.path.chunksize'] = 10000
+PREVIEW_DPI = 150  # Individual circuit / Bloch sphere images
+FINAL_DPI = 300    # Combined grids
+
+def save_figure(fig, filename):
+    """
+    Save a figure as PNG at preview DPI. Only the figure's own canvas is used and PNG
+    compression releases the GIL, so this runs on a thread pool; pyplot's figure
+    manager isn't thread-safe, so closing the figure is left to the main thread.
+    """
+    fig.savefig(filename, format="png", dpi=PREVIEW_DPI, pil_kwargs={"optimize": True})
+
 def create_combined_bb84_circuit(bit, alice_base, bob_base):
     """
     Create a single quantum circuit that includes:
@@ -39,26 +56,51 @@ def save_bb84_visuals():
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
     simulator = AerSimulator()
 
-    for bit, alice_base in test_cases:
-        for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
-            tag = f"{bit}_{alice_base}_to_{bob_base}"
-
-            # Step 1: Create the combined Alice-Bob circuit
-            qc_combined = create_combined_bb84_circuit(bit, alice_base, bob_base)
-            fig_circuit = qc_combined.draw(output='mpl')
-            fig_circuit.savefig(f"combined_circuit_{tag}.png", format="png", dpi=600)
-            plt.close(fig_circuit)
-            print(f"Saved combined Alice-Bob circuit as combined_circuit_{tag}.png")
-
-            # Step 2: Simulate Alice's state before measurement
-            qc_combined.save_statevector()
-            compiled_circuit = transpile(qc_combined, simulator)
-            result = simulator.run(compiled_circuit).result()
-            statevector = result.get_statevector()
+    # Simulation stays serial; PNG encoding of the figures is queued on a thread pool
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        pending = []  # (future, figure, message) for every queued save
+        tags = []
+        circuits = []
+        for bit, alice_base in test_cases:
+            for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
+                tag = f"{bit}_{alice_base}_to_{bob_base}"
+
+                # Step 1: Create the combined Alice-Bob circuit
+                qc_combined = create_combined_bb84_circuit(bit, alice_base, bob_base)
+                fig_circuit = qc_combined.draw(output='mpl')
+                pending.append((pool.submit(save_figure, fig_circuit, f"combined_circuit_{tag}.png"),
+                                fig_circuit, f"Saved combined Alice-Bob circuit as combined_circuit_{tag}.png"))
+
+                qc_combined.save_statevector()
+                tags.append(tag)
+                circuits.append(qc_combined)
+
+        # Step 2: Transpile and simulate all circuits in one batch
+        compiled_circuits = transpile(circuits, simulator, optimization_level=0)
+        result = simulator.run(compiled_circuits).result()
+
+        for i, tag in enumerate(tags):
+            statevector = result.get_statevector(i)
             fig_bloch = plot_bloch_multivector(statevector)
-            fig_bloch.savefig(f"bloch_{tag}.png", format="png", dpi=600)
-            plt.close(fig_bloch)
-            print(f"Saved Bloch sphere as bloch_{tag}.png")
+            pending.append((pool.submit(save_figure, fig_bloch, f"bloch_{tag}.png"),
+                            fig_bloch, f"Saved Bloch sphere as bloch_{tag}.png"))
+
+        # Close each figure and report it only once its file has been written
+        for future, fig, message in pending:
+            future.result()
+            plt.close(fig)  # Close figure to prevent memory leak
+            print(message)
+
+GRID_THUMBNAIL_SIZE = (1200, 1200)  # Grid cells are far smaller than the source PNGs
+
+def load_thumbnail(path):
+    """
+    Load an image downscaled to grid size instead of decoding it at full resolution.
+    """
+    img = Image.open(path)
+    img.draft("RGB", GRID_THUMBNAIL_SIZE)  # Only takes effect for JPEG sources
+    img.thumbnail(GRID_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(img)
 
 def visualize_grid(image_type, title):
     """
@@ -73,7 +115,7 @@ def visualize_grid(image_type, title):
         bob_base = 'Z'  # Assuming Bob measures in Z basis for simplicity
         tag = f"{bit}_{alice_base}_to_{bob_base}"
 
-        img = Image.open(f"{image_type}_{tag}.png")
+        img = load_thumbnail(f"{image_type}_{tag}.png")
         row, col = divmod(i, 2)
         axes[row, col].imshow(img)
         axes[row, col].axis("off")
@@ -82,7 +124,7 @@ def visualize_grid(image_type, title):
     plt.tight_layout()
     plt.subplots_adjust(top=0.9)
     output_filename = f"bb84_{image_type}_grid.png"
-    plt.savefig(output_filename, dpi=600)
+    plt.savefig(output_filename, dpi=FINAL_DPI, pil_kwargs={"optimize": True})
     plt.show()
     print(f"Saved {image_type} grid as {output_filename}")
 
@@ -1,27 +1,28 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
 import matplotlib
 matplotlib.use("Agg")  # Fixes renderer issue
 import matplotlib.pyplot as plt
 from PIL import Image  # To load images
-from qiskit import QuantumCircuit, Aer, transpile
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
 from qiskit.visualization import plot_bloch_multivector
-from qiskit.providers.aer import AerSimulator
 import random
 import math
+import shutil
 import time
 
 pi = math.pi
 start_time = time.time()
 
-def create_combined_bb84_circuit(bit, alice_base, bob_base):
+def create_alice_preparation(bit, alice_base):
     """
-    Create a single quantum circuit that includes:
-    - Alice's preparation using an alternative Hadamard:
-      H ∝ R_y(π/2) then R_z(π)
-    - Bob's measurement using the same transformation if his basis is X.
+    Create Alice's preparation circuit using an alternative Hadamard:
+    H ∝ R_y(π/2) then R_z(π)
     """
     qc = QuantumCircuit(1, 1)  # 1 qubit, 1 classical bit
 
-    # Alice's preparation
     if alice_base == 'Z':
         if bit == 1:
             qc.x(0)  # For Z basis, flip qubit to |1> if bit is 1
@@ -34,6 +35,16 @@ def create_combined_bb84_circuit(bit, alice_base, bob_base):
             qc.ry(pi/2, 0)
             qc.rz(pi, 0)  # Produces state equivalent to |->
 
+    return qc
+
+def create_combined_bb84_circuit(bit, alice_base, bob_base):
+    """
+    Create a single quantum circuit that includes:
+    - Alice's preparation (see create_alice_preparation)
+    - Bob's measurement using the same transformation if his basis is X.
+    """
+    qc = create_alice_preparation(bit, alice_base)
+
     # Bob's measurement: if Bob's chosen basis is X, apply the same sequence
     if bob_base == 'X':
         qc.ry(pi/2, 0)
@@ -42,39 +53,113 @@ def create_combined_bb84_circuit(bit, alice_base, bob_base):
     
     return qc
 
+# Alice's pre-measurement state for each (bit, basis), evolved once from the gate
+# matrices so rendering a Bloch sphere is a lookup instead of an Aer run
+ALICE_STATES = {
+    (bit, alice_base): Statevector(create_alice_preparation(bit, alice_base))
+    for bit in (0, 1) for alice_base in ('Z', 'X')
+}
+
+def circuit_key(qc):
+    """
+    Hashable description of a circuit's gate sequence, used to spot identical circuits.
+    """
+    return tuple((inst.operation.name, tuple(float(p) for p in inst.operation.params)) for inst in qc.data)
+
+PREVIEW_DPI = 150  # Per-case images only end up as tiles in the 600 DPI grids
+
+def figure_rgba(fig):
+    """
+    Render a figure and return its pixels as an RGBA array.
+    """
+    fig.canvas.draw()
+    return np.array(fig.canvas.buffer_rgba())
+
+def _render_one(bit, alice_base, bob_base, render_bloch):
+    """
+    Worker: save the combined circuit diagram for one case and, if requested,
+    plot Alice's state and save its Bloch sphere. Returns the files written
+    and the rendered images keyed by image type.
+    """
+    tag = f"{bit}_{alice_base}_to_{bob_base}"
+
+    # Create the combined Alice-Bob circuit
+    qc_combined = create_combined_bb84_circuit(bit, alice_base, bob_base)
+    circuit_filename = f"combined_circuit_{tag}.png"
+    fig_circuit = qc_combined.draw(output='mpl')
+    fig_circuit.savefig(circuit_filename, format="png", dpi=PREVIEW_DPI)
+    images = {"combined_circuit": figure_rgba(fig_circuit)}
+    plt.close(fig_circuit)
+    filenames = [circuit_filename]
+
+    if render_bloch:
+        # Look up the statevector (before measurement) and plot Bloch sphere
+        statevector = ALICE_STATES[(bit, alice_base)]
+        bloch_filename = f"bloch_{tag}.png"
+        fig_bloch = plot_bloch_multivector(statevector)
+        fig_bloch.savefig(bloch_filename, format="png", dpi=PREVIEW_DPI)
+        images["bloch"] = figure_rgba(fig_bloch)
+        plt.close(fig_bloch)
+        filenames.append(bloch_filename)
+
+    return filenames, images
+
 def save_bb84_visuals():
     """
-    Generate bit-basis pairs, create combined Alice-Bob circuits, simulate Bloch spheres,
-    and save images as PNG files.
+    Generate bit-basis pairs, create combined Alice-Bob circuits, plot Bloch spheres,
+    and save images as PNG files. Each case is rendered in its own worker process.
+    Returns the rendered images as {tag: {image_type: RGBA array}} for visualize_grid.
     """
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
-    simulator = AerSimulator()
-
-    for bit, alice_base in test_cases:
-        for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
-            tag = f"{bit}_{alice_base}_to_{bob_base}"
-
-            # Create the combined Alice-Bob circuit
-            qc_combined = create_combined_bb84_circuit(bit, alice_base, bob_base)
-            fig_circuit = qc_combined.draw(output='mpl')
-            fig_circuit.savefig(f"combined_circuit_{tag}.png", format="png", dpi=600)
-            plt.close(fig_circuit)
-            print(f"Saved combined Alice-Bob circuit as combined_circuit_{tag}.png")
-
-            # Simulate the statevector (before measurement) and plot Bloch sphere
-            qc_combined.save_statevector()
-            compiled_circuit = transpile(qc_combined, simulator)
-            result = simulator.run(compiled_circuit).result()
-            statevector = result.get_statevector()
-            fig_bloch = plot_bloch_multivector(statevector)
-            fig_bloch.savefig(f"bloch_{tag}.png", format="png", dpi=600)
-            plt.close(fig_bloch)
-            print(f"Saved Bloch sphere as bloch_{tag}.png")
-
-def visualize_grid(image_type, title):
+    bloch_cache = {}  # Alice's gate sequence -> Bloch sphere PNG rendered for it
+    copies = []       # (source, destination) Bloch sphere tags shared between cases
+    images = {}
+
+    with ProcessPoolExecutor(max_workers=min(8, os.cpu_count())) as executor:
+        futures = []
+        for bit, alice_base in test_cases:
+            for bob_base in ['Z', 'X']:  # Bob randomly picks Z or X basis
+                tag = f"{bit}_{alice_base}_to_{bob_base}"
+
+                # The state before Bob's gates and measurement only depends on Alice's
+                # preparation, so both Bob bases share one rendering
+                key = circuit_key(create_alice_preparation(bit, alice_base))
+                render_bloch = key not in bloch_cache
+                if render_bloch:
+                    bloch_cache[key] = tag
+                else:
+                    copies.append((bloch_cache[key], tag))
+                futures.append((tag, executor.submit(_render_one, bit, alice_base, bob_base, render_bloch)))
+
+        wait([future for _, future in futures])
+        for tag, future in futures:
+            filenames, images[tag] = future.result()
+            for filename in filenames:
+                print(f"Saved {filename}")
+
+    for source, destination in copies:
+        shutil.copyfile(f"bloch_{source}.png", f"bloch_{destination}.png")
+        images[destination]["bloch"] = images[source]["bloch"]
+        print(f"Saved bloch_{destination}.png")
+
+    return images
+
+GRID_THUMBNAIL_SIZE = (1200, 1200)  # Grid cells are far smaller than the source PNGs
+
+def load_thumbnail(path):
+    """
+    Load an image downscaled to grid size instead of decoding it at full resolution.
+    """
+    img = Image.open(path)
+    img.draft("RGB", GRID_THUMBNAIL_SIZE)  # Only takes effect for JPEG sources
+    img.thumbnail(GRID_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
+def visualize_grid(image_type, title, images=None):
     """
     Create a 2x2 grid for displaying either the combined circuits or Bloch spheres.
     :param image_type: "combined_circuit" or "bloch"
+    :param images: images returned by save_bb84_visuals; the PNGs on disk are read if omitted
     """
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
     fig, axes = plt.subplots(2, 2, figsize=(10, 10))
@@ -83,7 +168,10 @@ def visualize_grid(image_type, title):
     for i, (bit, alice_base) in enumerate(test_cases):
         bob_base = 'Z'  # For grid visualization, assume Bob uses the Z basis
         tag = f"{bit}_{alice_base}_to_{bob_base}"
-        img = Image.open(f"{image_type}_{tag}.png")
+        if images is not None:
+            img = images[tag][image_type]
+        else:
+            img = load_thumbnail(f"{image_type}_{tag}.png")
         row, col = divmod(i, 2)
         axes[row, col].imshow(img)
         axes[row, col].axis("off")
@@ -93,15 +181,15 @@ def visualize_grid(image_type, title):
     plt.subplots_adjust(top=0.9)
     output_filename = f"bb84_{image_type}_grid.png"
     plt.savefig(output_filename, dpi=600)
-    plt.show()
     print(f"Saved {image_type} grid as {output_filename}")
 
-# Run the visualization pipeline
-save_bb84_visuals()
+if __name__ == "__main__":
+    # Run the visualization pipeline
+    images = save_bb84_visuals()
 
-# Generate grids for combined circuits and Bloch spheres
-visualize_grid("combined_circuit", "BB84 Combined Circuit Grid")
-visualize_grid("bloch", "BB84 Bloch Sphere Grid")
+    # Generate grids for combined circuits and Bloch spheres from the in-memory renders
+    visualize_grid("combined_circuit", "BB84 Combined Circuit Grid", images)
+    visualize_grid("bloch", "BB84 Bloch Sphere Grid", images)
 
-end_time = time.time()
-print(f"Total time taken: {(end_time - start_time) * 1000} ms")
+    end_time = time.time()
+    print(f"Total time taken: {(end_time - start_time) * 1000} ms")
@@ -2,6 +2,7 @@ import matplotlib
 matplotlib.use("Agg")  # Fixes renderer issue
 import matplotlib.pyplot as plt
 from PIL import Image  # To load images
+import numpy as np
 from qiskit import QuantumCircuit, Aer, transpile
 from qiskit.visualization import plot_bloch_multivector
 from qiskit.providers.aer import AerSimulator
@@ -76,6 +77,17 @@ def save_bb84_visuals():
             plt.close(fig_bloch)
             print(f"Saved Bloch sphere as bloch_{tag}.png")
 
+GRID_THUMBNAIL_SIZE = (1200, 1200)  # Grid cells are far smaller than the source PNGs
+
+def load_thumbnail(path):
+    """
+    Load an image downscaled to grid size instead of decoding it at full resolution.
+    """
+    img = Image.open(path)
+    img.draft("RGB", GRID_THUMBNAIL_SIZE)  # Only takes effect for JPEG sources
+    img.thumbnail(GRID_THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    return np.asarray(img)
+
 def visualize_grid(image_type, title):
     """
     Create a 2x2 grid for displaying either the combined circuits or Bloch spheres.
@@ -88,7 +100,7 @@ def visualize_grid(image_type, title):
     for i, (bit, alice_base) in enumerate(test_cases):
         bob_base = 'Z'  # For grid visualization, assume Bob uses the Z basis
         tag = f"{bit}_{alice_base}_to_{bob_base}"
-        img = Image.open(f"{image_type}_{tag}.png")
+        img = load_thumbnail(f"{image_type}_{tag}.png")
         row, col = divmod(i, 2)
         axes[row, col].imshow(img)
         axes[row, col].axis("off")
@@ -1,19 +1,44 @@
-import subprocess
+import io
+import traceback
+from contextlib import redirect_stderr
 
-scripts = ["_BB84Naiveavg.py", "_BB84ryrzavg.py", "_BB84rzrxrzavg.py"]
+import _BB84Naiveavg
+import _BB84ryrzavg
+import _BB84rzrxrzavg
 
-with open("result.txt", "w") as result_file:
-    for script in scripts:
-        result_file.write(f"Running {script}...\n")
-        print(f"Running {script}...")
+# Each benchmark runs in this interpreter instead of a fresh one per script. They run one
+# after another, not in parallel, so no benchmark's timings include contention from another
+scripts = {
+    "_BB84Naiveavg.py": _BB84Naiveavg.run,
+    "_BB84ryrzavg.py": _BB84ryrzavg.run,
+    "_BB84rzrxrzavg.py": _BB84rzrxrzavg.run,
+}
 
-        result = subprocess.run(["python", script], capture_output=True, text=True)
-        
-        # Write output and errors to file
-        result_file.write(result.stdout)
-        result_file.write(result.stderr)
-        result_file.write("\n" + "=" * 80 + "\n")  # Separator for readability
+# Function to run one benchmark and return its report line and stderr; an exception
+# is reported in the stderr text instead of stopping the remaining benchmarks
+def run_script(script):
+    stderr = io.StringIO()
+    with redirect_stderr(stderr):
+        try:
+            output = scripts[script]()
+        except Exception:
+            output = ""
+            traceback.print_exc()
+    return output, stderr.getvalue()
 
-        # Also print output to console
-        print(result.stdout)
-        print(result.stderr)
+if __name__ == "__main__":
+    with open("result.txt", "w") as result_file:
+        for script in scripts:
+            result_file.write(f"Running {script}...\n")
+            print(f"Running {script}...")
+
+            output, errors = run_script(script)
+
+            # Write output and errors to file
+            result_file.write(output + "\n")
+            result_file.write(errors)
+            result_file.write("\n" + "=" * 80 + "\n")  # Separator for readability
+
+            # Also print output to console
+            print(output)
+            print(errors)
@@ -1,11 +1,19 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
 import matplotlib
 matplotlib.use("Agg")  # Use non-interactive backend
 import matplotlib.pyplot as plt
 
-from qiskit import QuantumCircuit, Aer, transpile
+from qiskit import QuantumCircuit, Aer
 from qiskit.visualization import plot_bloch_multivector
 from qiskit.providers.aer import AerSimulator
 
+# Created once per process and reused for every simulation
+_SIM = AerSimulator(method='statevector', max_parallel_threads=1)
+
+PREVIEW_DPI = 150  # Per-case images only end up as tiles in a grid
+FINAL_DPI = 600    # The assembled grid is the only high-resolution output
+
 def create_bb84_circuit(bit, base):
     """
     Create a BB84 quantum circuit based on a given bit (0/1) and basis (Z/X).
@@ -24,44 +32,51 @@ def create_bb84_circuit(bit, base):
 
     return qc
 
+def _render_one(bit, base):
+    """
+    Worker: simulate one (bit, base) case and save its Bloch sphere to a temporary PNG.
+    """
+    qc = create_bb84_circuit(bit, base)
+    qc.save_statevector()  # Save quantum state
+
+    # Simulate the circuit; x, h and save_statevector are native to Aer, so no transpile
+    result = _SIM.run(qc).result()
+    statevector = result.get_statevector()
+
+    # Generate Bloch sphere and save the figure temporarily
+    bloch_fig = plot_bloch_multivector(statevector)
+    temp_filename = f"bloch_{bit}_{base}.png"
+    bloch_fig.savefig(temp_filename, dpi=PREVIEW_DPI)
+    plt.close(bloch_fig)  # Close figure to prevent memory leak
+    return temp_filename
+
 def visualize_bb84():
     """
     Generate bit-basis pairs, create circuits, and plot all Bloch spheres in a grid.
+    The Bloch spheres are rendered in parallel worker processes.
     """
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
-    simulator = AerSimulator()
+
+    with ProcessPoolExecutor(max_workers=min(8, os.cpu_count())) as executor:
+        futures = [executor.submit(_render_one, bit, base) for bit, base in test_cases]
+        wait(futures)
 
     fig, axes = plt.subplots(2, 2, figsize=(10, 10))  # Create 2x2 grid
     fig.suptitle("BB84 Quantum State Visualization", fontsize=16)
 
-    for i, (bit, base) in enumerate(test_cases):
+    for i, ((bit, base), future) in enumerate(zip(test_cases, futures)):
         row, col = divmod(i, 2)  # Determine grid position
-        qc = create_bb84_circuit(bit, base)
-        qc.save_statevector()  # Save quantum state
-
-        # Simulate the circuit
-        compiled_circuit = transpile(qc, simulator)
-        result = simulator.run(compiled_circuit).result()
-        statevector = result.get_statevector()
-
-        # Generate Bloch sphere and store it in an image
-        bloch_fig = plot_bloch_multivector(statevector)
-
-        # Save the figure temporarily and read it as an image
-        temp_filename = f"bloch_{bit}_{base}.png"
-        bloch_fig.savefig(temp_filename, dpi=600)
-        plt.close(bloch_fig)  # Close figure to prevent memory leak
 
         # Load the saved image and plot it in the grid
-        img = plt.imread(temp_filename)
+        img = plt.imread(future.result())
         axes[row, col].imshow(img)
         axes[row, col].axis("off")  # Hide axes
         axes[row, col].set_title(f"Bit={bit}, Base={base}")
 
     plt.tight_layout()
     plt.subplots_adjust(top=0.9)  # Adjust title spacing
-    plt.savefig("bb84_bloch_grid.png", dpi=600)  # Save high-resolution image
-    plt.show()
+    plt.savefig("bb84_bloch_grid.png", dpi=FINAL_DPI)  # Save high-resolution image
 
-# Run the visualization
-visualize_bb84()
+if __name__ == "__main__":
+    # Run the visualization
+    visualize_bb84()
@@ -1,6 +1,13 @@
+import os
+import matplotlib
+INTERACTIVE = bool(os.environ.get("BENCH_INTERACTIVE"))  # Set BENCH_INTERACTIVE=1 to open plot windows
+if not INTERACTIVE:
+    matplotlib.use("Agg")  # Batch runs only write files
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import ImageGrid
 
+FINAL_DPI = 600  # The assembled grid is the only high-resolution output
+
 def visualize_bb84_grid():
     """
     Load EPS images directly and arrange them in a 2x2 grid.
@@ -20,8 +27,9 @@ def visualize_bb84_grid():
         ax.set_title(f"Bit={bit}, Base={base}")
 
     plt.suptitle("BB84 Quantum State Visualization", fontsize=16)
-    plt.savefig("bb84_bloch_grid.eps", format='eps', dpi=600)  # Save final grid as EPS
-    plt.show()
+    plt.savefig("bb84_bloch_grid.eps", format='eps', dpi=FINAL_DPI)  # Save final grid as EPS
+    if INTERACTIVE:
+        plt.show()
 
 # Run the visualization
 visualize_bb84_grid()
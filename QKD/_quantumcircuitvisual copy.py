@@ -1,11 +1,18 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, wait
 import matplotlib
 matplotlib.use("Agg")  # Fixes the renderer issue
 import matplotlib.pyplot as plt
 
-from qiskit import QuantumCircuit, Aer, transpile
+from qiskit import QuantumCircuit, Aer
 from qiskit.visualization import plot_bloch_multivector, circuit_drawer
 from qiskit.providers.aer import AerSimulator
 
+# Created once per process and reused for every simulation
+_SIM = AerSimulator(method='statevector', max_parallel_threads=1)
+
+PREVIEW_DPI = 150  # Per-case images only end up as tiles in a grid
+
 def create_bb84_circuit(bit, base):
     """
     Create a BB84 quantum circuit based on a given bit (0/1) and basis (Z/X).
@@ -24,35 +31,47 @@ def create_bb84_circuit(bit, base):
 
     return qc
 
+def _render_one(bit, base):
+    """
+    Worker: simulate one (bit, base) case and save its Bloch sphere and circuit as EPS.
+    """
+    qc = create_bb84_circuit(bit, base)
+    qc.save_statevector()  # Save quantum state
+
+    # Simulate the circuit; x, h and save_statevector are native to Aer, so no transpile
+    result = _SIM.run(qc).result()
+    statevector = result.get_statevector()
+
+    # Save Bloch Sphere as EPS
+    fig_bloch = plot_bloch_multivector(statevector)
+    bloch_filename = f"bloch_{bit}_{base}.eps"
+    fig_bloch.savefig(bloch_filename, format="eps", dpi=PREVIEW_DPI)
+    plt.close(fig_bloch)  # Close figure to prevent memory leak
+
+    # Save Circuit Diagram as EPS
+    circuit_filename = f"circuit_{bit}_{base}.eps"
+    fig_circuit = qc.draw(output='mpl')  # Matplotlib-based drawing
+    fig_circuit.savefig(circuit_filename, format="eps", dpi=PREVIEW_DPI)
+    plt.close(fig_circuit)  # Close figure to prevent memory leak
+
+    return bloch_filename, circuit_filename
+
 def visualize_bb84():
     """
     Generate random bit-basis pairs, create circuits, and save visualizations as EPS files.
+    Each case is rendered in its own worker process.
     """
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
-    simulator = AerSimulator()
-
-    for bit, base in test_cases:
-        qc = create_bb84_circuit(bit, base)
-        qc.save_statevector()  # Save quantum state
-
-        # Simulate the circuit
-        compiled_circuit = transpile(qc, simulator)
-        result = simulator.run(compiled_circuit).result()
-        statevector = result.get_statevector()
-
-        # Save Bloch Sphere as EPS
-        fig_bloch = plot_bloch_multivector(statevector)
-        bloch_filename = f"bloch_{bit}_{base}.eps"
-        fig_bloch.savefig(bloch_filename, format="eps", dpi=600)
-        plt.close(fig_bloch)  # Close figure to prevent memory leak
-        print(f"Saved Bloch sphere as {bloch_filename}")
 
-        # Save Circuit Diagram as EPS
-        circuit_filename = f"circuit_{bit}_{base}.eps"
-        fig_circuit = qc.draw(output='mpl')  # Matplotlib-based drawing
-        fig_circuit.savefig(circuit_filename, format="eps", dpi=600)
-        plt.close(fig_circuit)  # Close figure to prevent memory leak
+    with ProcessPoolExecutor(max_workers=min(8, os.cpu_count())) as executor:
+        futures = [executor.submit(_render_one, bit, base) for bit, base in test_cases]
+        wait(futures)
+
+    for future in futures:
+        bloch_filename, circuit_filename = future.result()
+        print(f"Saved Bloch sphere as {bloch_filename}")
         print(f"Saved circuit diagram as {circuit_filename}")
 
-# Run the visualization
-visualize_bb84()
+if __name__ == "__main__":
+    # Run the visualization
+    visualize_bb84()
@@ -1,9 +1,17 @@
-from qiskit import QuantumCircuit, Aer, transpile
+from qiskit import QuantumCircuit, Aer
 from qiskit.visualization import plot_bloch_multivector, circuit_drawer
 from qiskit.providers.aer import AerSimulator
+import os
+import matplotlib
+INTERACTIVE = bool(os.environ.get("BENCH_INTERACTIVE"))  # Set BENCH_INTERACTIVE=1 to open plot windows
+if not INTERACTIVE:
+    matplotlib.use("Agg")  # Batch runs only write files
 import matplotlib.pyplot as plt
 import random
 
+# Created once per process and reused for every simulation
+_SIM = AerSimulator(method='statevector', max_parallel_threads=1)
+
 def create_bb84_circuit(bit, base):
     """
     Create a BB84 quantum circuit based on a given bit (0/1) and basis (Z/X).
@@ -27,22 +35,26 @@ def visualize_bb84():
     Generate random bit-basis pairs, create circuits, and visualize Bloch sphere.
     """
     test_cases = [(0, 'Z'), (1, 'Z'), (0, 'X'), (1, 'X')]
-    simulator = AerSimulator()
 
     for i, (bit, base) in enumerate(test_cases):
         print(f"\nVisualizing Bit={bit}, Base={base}")
         qc = create_bb84_circuit(bit, base)
         qc.save_statevector()  # Save quantum state
 
-        # Simulate the circuit
-        compiled_circuit = transpile(qc, simulator)
-        result = simulator.run(compiled_circuit).result()
+        # Simulate the circuit; x, h and save_statevector are native to Aer, so no transpile
+        result = _SIM.run(qc).result()
         statevector = result.get_statevector()
 
-        # Visualize Bloch Sphere
-        plot_bloch_multivector(statevector)
+        # Visualize Bloch Sphere; batch runs save it instead of opening a window
+        fig = plot_bloch_multivector(statevector)
         plt.title(f"Bit={bit}, Base={base}")
-        plt.show()
+        if INTERACTIVE:
+            plt.show()
+        else:
+            bloch_filename = f"bloch_{bit}_{base}.png"
+            fig.savefig(bloch_filename, dpi=150)
+            plt.close(fig)
+            print(f"Saved Bloch sphere as {bloch_filename}")
 
         # Visualize circuit
         print(qc.draw())
@@ -1,7 +1,14 @@
+import os
+import matplotlib
+INTERACTIVE = bool(os.environ.get("BENCH_INTERACTIVE"))  # Set BENCH_INTERACTIVE=1 to open plot windows
+if not INTERACTIVE:
+    matplotlib.use("Agg")  # Batch runs only write files
 import matplotlib.pyplot as plt
 import re
 
-# Read the text file
+RESULT_FILE = "result.txt"  # Written by _avgqkd.py
+
+# Sample results, used when RESULT_FILE has not been generated yet
 file_content = """
 Running _BB84Naiveavg.py...
 Average time taken over 100 runs: 1385.11 ms
@@ -17,13 +24,34 @@ Average time taken over 100 runs: 1489.82 ms
 ================================================================================
 """
 
-# Extract method names and times using regex
-pattern = r"Running (.*?)\.\.\.\nAverage time taken over 100 runs: ([\d.]+) ms"
-matches = re.findall(pattern, file_content)
+# Compiled once; each matches a single line so results can be parsed as they are read
+RUNNING_PATTERN = re.compile(r"Running (.*?)\.\.\.$")
+AVERAGE_PATTERN = re.compile(r"Average time taken over \d+ runs: ([\d.]+) ms")
+
+def parse_results(lines):
+    """
+    Extract (method, time in ms) pairs from an iterable of result lines.
+    """
+    methods, times = [], []
+    method = None
+    for line in lines:
+        running = RUNNING_PATTERN.match(line)
+        if running:
+            method = running.group(1)
+            continue
+        average = AVERAGE_PATTERN.match(line)
+        if average and method is not None:
+            methods.append(method)
+            times.append(float(average.group(1)))
+            method = None
+    return methods, times
 
-# Process extracted data
-methods = [match[0] for match in matches]  # Extract method names
-times = [float(match[1]) for match in matches]  # Convert times to float
+# Stream the real results file line by line if it exists
+if os.path.exists(RESULT_FILE):
+    with open(RESULT_FILE) as f:
+        methods, times = parse_results(f)
+else:
+    methods, times = parse_results(file_content.splitlines())
 
 # Plotting
 fig, ax = plt.subplots(figsize=(10, 6))  # 600 DPI, 6x4 inches for high resolution
@@ -35,4 +63,5 @@ ax.set_xticklabels(methods, rotation=45, ha='right')
 plt.savefig('_BenchBB84.eps', format='eps', dpi=600)
 
 # Show the graph
-plt.show()
+if INTERACTIVE:
+    plt.show()
@@ -4,6 +4,7 @@ from skopt.space import Real, Integer
 from skopt.utils import use_named_args
 import numpy as np
 from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs_parallel, quantize_params
 
 NO_OF_BITS = 24
 
@@ -31,13 +32,8 @@ if __name__ == "__main__":
         distance = float(distance)
         timeout = float(timeout)
         
-        # Run simulation
-        success_count = avg_100_runs(
-            NO_OF_BITS,
-            distance=distance,
-            timeout=timeout,
-            max_retries=max_retries
-        )
+        # Run simulation (cached in prept5_cached, shared with the other drivers)
+        success_count = avg_100_runs_parallel(NO_OF_BITS, distance, timeout, max_retries)
         
         # Composite objective: Maximize distance with success rate constraint
         if success_count >= 95:
@@ -56,19 +52,20 @@ if __name__ == "__main__":
         random_state=42
     )
 
-    # Print results
+    # Print results at the grid point the objective actually simulated
+    best_distance, best_timeout, best_max_retries = quantize_params(*result.x)
     print("\nOptimization results:")
-    print(f"Best distance: {result.x[0]:.2f}m")
-    print(f"Best timeout: {result.x[1]:.2e}ns")
-    print(f"Best max_retries: {int(result.x[2])}")
+    print(f"Best distance: {best_distance:.2f}m")
+    print(f"Best timeout: {best_timeout:.2e}ns")
+    print(f"Best max_retries: {best_max_retries}")
     print(f"Best objective value: {-result.fun:.2f} (maximized distance)")
     
-    # Verify with final run
+    # Verify with a fresh (uncached) run of the same configuration
     print("\nVerification run with best parameters:")
     final_count = avg_100_runs(
         NO_OF_BITS,
-        distance=result.x[0],
-        timeout=result.x[1],
-        max_retries=int(result.x[2])
+        distance=best_distance,
+        timeout=best_timeout,
+        max_retries=best_max_retries
     )
     print(f"Final success rate: {final_count}/100")
\ No newline at end of file
@@ -1,12 +1,17 @@
 # Add these imports at the top
+import os
+import matplotlib
+INTERACTIVE = bool(os.environ.get("BENCH_INTERACTIVE"))  # Set BENCH_INTERACTIVE=1 to open plot windows
+if not INTERACTIVE:
+    matplotlib.use("Agg")  # Batch runs only write files
+import matplotlib.pyplot as plt
 from skopt import gp_minimize
 from skopt.space import Real, Integer
 from skopt.utils import use_named_args
 from skopt.callbacks import DeltaYStopper
 from skopt.plots import plot_convergence
-import matplotlib.pyplot as plt
 import numpy as np
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs_parallel, quantize_params
 
 NO_OF_BITS = 24
 
@@ -19,35 +24,31 @@ PARAM_RANGES = {
 
 # Add this function to write results to a file
 def write_results_to_file(filename, stage1_result, final_result):
+    # Parameters are reported at the grid point the objective actually simulated
+    lines = ["=== Optimization Results ===\n"]
+    for name, result in (("Stage 1: Broad Exploration", stage1_result),
+                         ("Stage 2: Focused Exploitation", final_result)):
+        distance, timeout, max_retries = quantize_params(*result.x)
+        lines += [
+            name,
+            f"  Iterations: {len(result.func_vals)}",
+            f"  Best Objective: {-result.fun:.2f}",
+            f"  Best Parameters:",
+            f"    Distance: {distance:.2f}m",
+            f"    Timeout: {timeout:.2e}ns",
+            f"    Max Retries: {max_retries}\n",
+        ]
+    lines += [
+        "=== Convergence Details ===",
+        f"  Total Iterations: {len(stage1_result.func_vals) + len(final_result.func_vals)}",
+        f"  Final Objective: {-final_result.fun:.2f}",
+        f"  Optimal Distance: {distance:.2f}m",
+        f"  Optimal Timeout: {timeout:.2e}ns",
+        f"  Optimal Max Retries: {max_retries}",
+    ]
+    # Build the report once and write it in a single call
     with open(filename, 'w') as f:
-        # Write header
-        f.write("=== Optimization Results ===\n\n")
-        
-        # Write stage 1 summary
-        f.write("Stage 1: Broad Exploration\n")
-        f.write(f"  Iterations: {len(stage1_result.func_vals)}\n")
-        f.write(f"  Best Objective: {-stage1_result.fun:.2f}\n")
-        f.write(f"  Best Parameters:\n")
-        f.write(f"    Distance: {stage1_result.x[0]:.2f}m\n")
-        f.write(f"    Timeout: {stage1_result.x[1]:.2e}ns\n")
-        f.write(f"    Max Retries: {int(stage1_result.x[2])}\n\n")
-        
-        # Write stage 2 summary
-        f.write("Stage 2: Focused Exploitation\n")
-        f.write(f"  Iterations: {len(final_result.func_vals)}\n")
-        f.write(f"  Best Objective: {-final_result.fun:.2f}\n")
-        f.write(f"  Best Parameters:\n")
-        f.write(f"    Distance: {final_result.x[0]:.2f}m\n")
-        f.write(f"    Timeout: {final_result.x[1]:.2e}ns\n")
-        f.write(f"    Max Retries: {int(final_result.x[2])}\n\n")
-        
-        # Write convergence details
-        f.write("=== Convergence Details ===\n")
-        f.write(f"  Total Iterations: {len(stage1_result.func_vals) + len(final_result.func_vals)}\n")
-        f.write(f"  Final Objective: {-final_result.fun:.2f}\n")
-        f.write(f"  Optimal Distance: {final_result.x[0]:.2f}m\n")
-        f.write(f"  Optimal Timeout: {final_result.x[1]:.2e}ns\n")
-        f.write(f"  Optimal Max Retries: {int(final_result.x[2])}\n")
+        f.write("\n".join(lines) + "\n")
 
 # Add optimization code at the end
 if __name__ == "__main__":
@@ -61,12 +62,7 @@ if __name__ == "__main__":
     # Objective function
     @use_named_args(space)
     def objective(distance, timeout, max_retries):
-        success_count = avg_100_runs(
-            NO_OF_BITS,
-            distance=float(distance),
-            timeout=float(timeout),
-            max_retries=int(max_retries)
-        )
+        success_count = avg_100_runs_parallel(NO_OF_BITS, distance, timeout, max_retries)
         return -distance if success_count >= 90 else -(distance * (success_count/100))
 
     # Early stopping callback
@@ -81,7 +77,7 @@ if __name__ == "__main__":
         func=objective,
         dimensions=space,
         n_calls=100,
-        n_initial_points=100,
+        n_initial_points=20,  # Leave 80 GP-guided calls so the early stopper can act
         acq_func='gp_hedge',
         n_jobs=-1,
         callback=[early_stop],
@@ -131,7 +127,8 @@ if __name__ == "__main__":
 
     # Save and show the plot
     plt.savefig("convergence.png", dpi=600)
-    plt.show()
+    if INTERACTIVE:
+        plt.show()
     # Add this after generating the convergence plot
     write_results_to_file("optimization_results.txt", stage1_result, final_result)
     print("Results saved to optimization_results.txt") 
\ No newline at end of file
@@ -4,7 +4,7 @@ import matplotlib.pyplot as plt
 from skopt import gp_minimize
 from skopt.space import Real, Integer
 from skopt.callbacks import DeltaYStopper
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs_parallel, quantize_params
 
 # Parameter ranges
 PARAM_RANGES = {
@@ -14,6 +14,7 @@ PARAM_RANGES = {
 }
 
 BIT_SIZES = [2**i for i in range(1, 9)]  # [2, 4, 8, ..., 256]
+WARM_START_POINTS = 10  # Best points of one bit size that seed the next sweep
 
 # Define search space
 space = [
@@ -25,77 +26,80 @@ space = [
 # Objective function
 def objective(n_bits, **params):
     """Compute the objective function based on success count."""
-    success_count = avg_100_runs(
-        n_bits,
-        float(params['distance']),
-        float(params['timeout']),
-        int(params['max_retries'])
-    )
+    success_count = avg_100_runs_parallel(n_bits, params['distance'], params['timeout'], params['max_retries'])
     return -params['distance'] if success_count >= 90 else -(params['distance'] * (success_count / 100))
 
 # Wrapper function to pass parameters correctly
 def objective_with_bits(params):
     return objective(n_bits, **dict(zip(['distance', 'timeout', 'max_retries'], params)))
 
-# Function to write results to CSV
-def write_results_to_csv(filename, results):
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["Bits", "Best Distance", "Best Timeout", "Best Max Retries", "Best Objective"])
-        writer.writerows(results)
+RESULTS_FILE = "BO_algorithm_results.csv"
 
-# Run optimization for each bit size
-results = []
-for n_bits in BIT_SIZES:
-    print(f"\n=== Optimizing for {n_bits} bits ===")
+# Guarded so the pool workers behind avg_100_runs_parallel can import this module
+if __name__ == "__main__":
+    # Run optimization for each bit size, appending each row as soon as it is known
+    # so a crash mid-sweep keeps the bit sizes already finished
+    results_file = open(RESULTS_FILE, 'w', newline='')
+    writer = csv.writer(results_file)
+    writer.writerow(["Bits", "Best Distance", "Best Timeout", "Best Max Retries", "Best Objective"])
+    warm_start = None
+    for n_bits in BIT_SIZES:
+        print(f"\n=== Optimizing for {n_bits} bits ===")
 
-    early_stop = DeltaYStopper(n_best=15, delta=0.01)
+        early_stop = DeltaYStopper(n_best=15, delta=0.01)
 
-    print("Stage 1: Broad Exploration (100 iterations)")
-    stage1_result = gp_minimize(
-        func=objective_with_bits,
-        dimensions=space,
-        n_calls=100,
-        n_initial_points=100,
-        acq_func='gp_hedge',
-        n_jobs=-1,
-        callback=[early_stop],
-        random_state=42,
-        verbose=True
-    )
+        print("Stage 1: Broad Exploration (100 iterations)")
+        stage1_result = gp_minimize(
+            func=objective_with_bits,
+            dimensions=space,
+            x0=warm_start,
+            n_calls=100,
+            n_initial_points=20,  # Leave 80 GP-guided calls so the early stopper can act
+            acq_func='gp_hedge',
+            n_jobs=-1,
+            callback=[early_stop],
+            random_state=42,
+            verbose=True
+        )
 
-    print("Stage 2: Focused Exploitation (50 iterations)")
-    final_result = gp_minimize(
-        func=objective_with_bits,
-        dimensions=space,
-        x0=stage1_result.x_iters,
-        y0=stage1_result.func_vals,
-        n_calls=50,
-        acq_func='gp_hedge',
-        n_jobs=-1,
-        callback=[early_stop],
-        random_state=42,
-        verbose=True
-    )
+        print("Stage 2: Focused Exploitation (50 iterations)")
+        final_result = gp_minimize(
+            func=objective_with_bits,
+            dimensions=space,
+            x0=stage1_result.x_iters,
+            y0=stage1_result.func_vals,
+            n_calls=50,
+            acq_func='gp_hedge',
+            n_jobs=-1,
+            callback=[early_stop],
+            random_state=42,
+            verbose=True
+        )
 
-    best_distance, best_timeout, best_max_retries = final_result.x
-    best_objective = -final_result.fun
-    results.append([n_bits, best_distance, best_timeout, best_max_retries, best_objective])
+        # Report the grid point the objective actually simulated
+        best_distance, best_timeout, best_max_retries = quantize_params(*final_result.x)
+        best_objective = -final_result.fun
+        writer.writerow([n_bits, best_distance, best_timeout, best_max_retries, best_objective])
+        results_file.flush()
 
-    # Plot convergence
-    plt.figure(figsize=(10, 5))
-    all_calls = np.arange(1, len(stage1_result.func_vals) + len(final_result.func_vals) + 1)
-    all_values = np.concatenate([stage1_result.func_vals, final_result.func_vals])
-    plt.plot(all_calls, np.minimum.accumulate(all_values), label="Cumulative Minimum", linewidth=2)
-    plt.axvline(x=len(stage1_result.func_vals), color='red', linestyle='--', label="Stage 1 → Stage 2")
-    plt.xlabel("Number of Calls")
-    plt.ylabel("Objective Value")
-    plt.title(f"Convergence for {n_bits} Bits")
-    plt.legend()
-    plt.grid(True)
-    plt.savefig(f"convergence_{n_bits}bits.png", dpi=600)
-    plt.close()
+        # Seed the next bit size with this one's best points. Their objective values
+        # change with n_bits so they are re-evaluated rather than passed as y0.
+        best_indices = np.argsort(final_result.func_vals)[:WARM_START_POINTS]
+        warm_start = [list(final_result.x_iters[i]) for i in best_indices]
 
-# Save results to CSV
-write_results_to_csv("BO_algorithm_results.csv", results)
-print("Results saved to genetic_algorithm_results.csv")
+        # Plot convergence
+        plt.figure(figsize=(10, 5))
+        all_calls = np.arange(1, len(stage1_result.func_vals) + len(final_result.func_vals) + 1)
+        all_values = np.concatenate([stage1_result.func_vals, final_result.func_vals])
+        plt.plot(all_calls, np.minimum.accumulate(all_values), label="Cumulative Minimum", linewidth=2)
+        plt.axvline(x=len(stage1_result.func_vals), color='red', linestyle='--', label="Stage 1 → Stage 2")
+        plt.xlabel("Number of Calls")
+        plt.ylabel("Objective Value")
+        plt.title(f"Convergence for {n_bits} Bits")
+        plt.legend()
+        plt.grid(True)
+        plt.savefig(f"convergence_{n_bits}bits.png", dpi=600)
+        plt.close()
+
+    results_file.close()
+    print(f"Results saved to {RESULTS_FILE}")
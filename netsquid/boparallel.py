@@ -1,10 +1,9 @@
 from skopt import Optimizer
 from skopt.space import Real, Integer
-from skopt.utils import use_named_args
 from skopt.callbacks import DeltaYStopper
 from joblib import Parallel, delayed
 import numpy as np
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs, quantize_params
 
 # Global variables and parameter ranges
 NO_OF_BITS = 24
@@ -19,10 +18,13 @@ space = [
     Integer(*PARAM_RANGES['max_retries'], name='max_retries')
 ]
 
-# Objective function using named arguments
-@use_named_args(space)
-def objective(distance, timeout, max_retries):
-    success_count = avg_100_runs(NO_OF_BITS, float(distance), float(timeout), int(max_retries))
+# Quantized parameters -> objective value, kept in the main process
+# because joblib workers would not share a memoized function
+evaluation_cache = {}
+
+# Objective function on plain floats, so workers receive only a small tuple per task
+def objective_raw(distance, timeout, max_retries):
+    success_count = avg_100_runs(NO_OF_BITS, distance, timeout, max_retries)
     # For example, maximize success_count; here we minimize a negative score.
     return -distance if success_count >= 90 else -(distance * (success_count/100))
 
@@ -36,14 +38,20 @@ n_calls = 300
 batch_size = 16  # Number of candidates to evaluate in parallel at each iteration
 all_obj_values = []
 
+# One loky pool reused for every batch; tasks are grouped to cut per-call pickling
+parallel = Parallel(n_jobs=-1, backend='loky', prefer='processes', batch_size=4)
+
 # Loop using the ask-and-tell interface
 for i in range(0, n_calls, batch_size):
     # Ask for a batch of candidate points
     candidates = [optimizer.ask() for _ in range(batch_size)]
     
-    # Evaluate candidates in parallel using joblib
-    results = Parallel(n_jobs=-1)(delayed(objective)(cand) for cand in candidates)
-
+    # Evaluate only the distinct, not-yet-seen candidates in parallel using joblib
+    keys = [quantize_params(*cand) for cand in candidates]
+    pending = [key for key in dict.fromkeys(keys) if key not in evaluation_cache]
+    values = parallel(delayed(objective_raw)(*key) for key in pending)
+    evaluation_cache.update(zip(pending, values))
+    results = [evaluation_cache[key] for key in keys]
     
     # Tell the optimizer the results for each candidate
     for cand, res in zip(candidates, results):
@@ -57,7 +65,7 @@ for i in range(0, n_calls, batch_size):
 
 # Final result is stored in the optimizer
 best_index = np.argmin(optimizer.yi)
-best_params = optimizer.Xi[best_index]
+best_params = quantize_params(*optimizer.Xi[best_index])  # The grid point that was actually simulated
 best_obj_value = optimizer.yi[best_index]
 print("Best parameters:", best_params)
 print("Best objective value:", best_obj_value)
@@ -0,0 +1,23 @@
+#!/usr/bin/env bash
+# Builds liboqs as a shared library tuned for this machine (OQS_OPT_TARGET=native), so Kyber
+# uses its AVX2 implementation on x86-64 and its NEON one on ARM, and installs it where the
+# oqs Python wrapper looks first. Run once, before the prept5 drivers.
+#
+# The checked-out tag defaults to the installed liboqs-python version, since the wrapper
+# refuses a liboqs of another release; set LIBOQS_VERSION to override it.
+
+set -e
+INSTALL_PATH="${OQS_INSTALL_PATH:-$HOME/_oqs}"
+LIBOQS_VERSION="${LIBOQS_VERSION:-$(python3 -c 'from importlib.metadata import version; print(version("liboqs-python"))' 2>/dev/null || echo 0.10.1)}"
+BUILD_DIR="${BUILD_DIR:-$(mktemp -d)}"
+
+git clone --depth 1 --branch "$LIBOQS_VERSION" https://github.com/open-quantum-safe/liboqs.git "$BUILD_DIR/liboqs"
+cmake -S "$BUILD_DIR/liboqs" -B "$BUILD_DIR/build" \
+  -DCMAKE_BUILD_TYPE=Release \
+  -DBUILD_SHARED_LIBS=ON \
+  -DOQS_DIST_BUILD=OFF \
+  -DOQS_OPT_TARGET=native \
+  -DCMAKE_INSTALL_PREFIX="$INSTALL_PATH"
+cmake --build "$BUILD_DIR/build" --parallel
+cmake --install "$BUILD_DIR/build"
+echo "liboqs $LIBOQS_VERSION installed to $INSTALL_PATH (sources and build left in $BUILD_DIR)"
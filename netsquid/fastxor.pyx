@@ -0,0 +1,25 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+XOR helper for prept5.xor_with_key: the data is XORed with the key repeated to its
+length by xor_words.c, straight into the bytes object that is returned.
+
+Build in place with:
+    python setup.py build_ext --inplace
+"""
+from libc.stdint cimport uint8_t
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+
+cdef extern from "xor_words.h" nogil:
+    void xor_cycle_words(const uint8_t *data, size_t n, const uint8_t *key, size_t m, uint8_t *out)
+
+cpdef bytes xor_cycle(const unsigned char[::1] data, const unsigned char[::1] key):
+    """
+    Returns data XOR key, with key repeated (cycled) to the length of data.
+    """
+    cdef Py_ssize_t n = data.shape[0]
+    if key.shape[0] == 0:
+        raise ValueError("key must not be empty")
+    cdef bytes out = PyBytes_FromStringAndSize(NULL, n)
+    if n:
+        xor_cycle_words(&data[0], n, &key[0], key.shape[0], <uint8_t *> PyBytes_AS_STRING(out))
+    return out
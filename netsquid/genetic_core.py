@@ -0,0 +1,86 @@
+import numpy as np
+from concurrent.futures import as_completed
+from prept5_cached import avg_100_runs, lookup, quantize_params, TIMEOUT_GRID
+
+# GA operators and fitness evaluation shared by the process-pool GA drivers
+# (genetict5parallel, genetict5parallelplot, genetict5parallelevolutiontree, geneticparallelsweep)
+
+# Search space for [distance, timeout, max_retries] chromosomes
+DISTANCE_MIN = 1   # Minimum distance (in meters)
+DISTANCE_MAX = 200  # Maximum distance (in meters)
+MAX_RETRIES_MIN = 1 # Minimum max_retries
+MAX_RETRIES_MAX = 10# Maximum max_retries
+CONVERGENCE_STD = 0.01  # Parents whose genes all spread less than 1% of their scale have converged
+
+rng = np.random.default_rng()  # Shared generator for population creation, crossover and mutation
+
+# Function to generate a random population as a (size, 3) array of
+# [distance, timeout, max_retries] rows
+def create_population(size):
+    return np.column_stack([
+        rng.integers(DISTANCE_MIN, DISTANCE_MAX + 1, size),
+        rng.choice(TIMEOUT_GRID, size),  # Timeouts only take values on the shared log grid, so each one is simulated as-is
+        rng.integers(MAX_RETRIES_MIN, MAX_RETRIES_MAX + 1, size),
+    ])
+
+# Function for crossover: each offspring takes the genes before a random point
+# (after distance or after timeout) from one parent and the rest from another
+def crossover(parents, n_offspring):
+    first = rng.integers(0, len(parents), n_offspring)
+    second = (first + rng.integers(1, len(parents), n_offspring)) % len(parents)  # Never the same parent
+    crossover_point = rng.integers(1, 3, size=(n_offspring, 1))
+    return np.where(np.arange(3) < crossover_point, parents[first], parents[second])
+
+# Function for mutation: from row `start` on, each chromosome has one random gene
+# redrawn with probability mutation_rate (in place)
+def mutate(population, mutation_rate, start=0):
+    rows = start + np.flatnonzero(rng.random(len(population) - start) < mutation_rate)
+    genes = rng.integers(0, 3, size=len(rows))
+    population[rows, genes] = create_population(len(rows))[np.arange(len(rows)), genes]
+    return population
+
+# Per-gene scale so distance, log10(timeout) and max_retries spreads are comparable
+GENE_SCALE = np.array([DISTANCE_MAX, np.log10(TIMEOUT_GRID[-1]), MAX_RETRIES_MAX], dtype=np.float64)
+
+# Function to check whether the parents have collapsed onto (nearly) one genome:
+# every gene's standard deviation is under CONVERGENCE_STD of its scale
+def parents_converged(parents):
+    genes = parents.astype(np.float64)
+    genes[:, 1] = np.log10(genes[:, 1])  # Timeouts are sampled log-uniformly, so compare them in log space
+    return bool(np.all(genes.std(axis=0) / GENE_SCALE < CONVERGENCE_STD))
+
+# Function to get the accuracy (%) of every chromosome in the population. Only distinct
+# chromosomes missing from the shared prept5_cached store are simulated, one task each,
+# collected as each finishes so a slow simulation only delays itself
+def evaluate_population(n_bits, population, executor):
+    keys = [quantize_params(*chromosome) for chromosome in population]
+    accuracies = {key: lookup(n_bits, key, 100) for key in dict.fromkeys(keys)}
+    futures = {executor.submit(avg_100_runs, n_bits, *key): key
+               for key, accuracy in accuracies.items() if accuracy is None}
+    for future in as_completed(futures):
+        accuracies[futures[future]] = future.result()
+    return np.array([accuracies[key] for key in keys], dtype=np.float64)
+
+# Function to score chromosomes by distance, scaled down by their accuracy when it is
+# below accuracy_threshold
+def fitness_from_accuracy(population, accuracies, accuracy_threshold):
+    distances = population[:, 0]
+    return np.where(accuracies >= accuracy_threshold, distances, distances * (accuracies / 100))
+
+# Function to pick the indices of the k highest scores, best first; only the top half
+# is ever used (best, elites and parents), so there is no need to rank the rest
+def top_indices(scores, k):
+    return np.argsort(-np.asarray(scores), kind='stable')[:k]
+
+# Function to breed the next generation from the selected parents (best first)
+def next_generation(parents, population_size, elite_k, mutation_rate, generation):
+    # Elitism: carry the best chromosomes over unchanged so their cached fitness is reused
+    elites = parents[:elite_k]
+    if parents_converged(parents):
+        # Crossing identical parents only reproduces them, so skip crossover and
+        # restart every non-elite slot from a fresh random draw instead
+        print(f"Parents converged at generation {generation+1}; restarting non-elite chromosomes")
+        return np.concatenate([elites, create_population(population_size - elite_k)])
+    # Crossover fills the rest of the population, then mutation perturbs it
+    new_population = np.concatenate([elites, crossover(parents, population_size - elite_k)])
+    return mutate(new_population, mutation_rate, start=elite_k)  # Elites are never mutated
@@ -1,5 +1,4 @@
 import os
-import csv
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D  # Required for 3D plotting
@@ -7,6 +6,8 @@ from mpl_toolkits.mplot3d import Axes3D  # Required for 3D plotting
 # Directory containing the batch CSV files
 CSV_DIR = "batches_csv"
 
+MAX_SCATTER_POINTS = 5000  # Points drawn in the 3D scatter; larger datasets are thinned
+
 def read_batch_csv():
     """
     Reads all CSV files in CSV_DIR and aggregates the data.
@@ -19,30 +20,25 @@ def read_batch_csv():
       - max_retries values (Z axis)
       - fitness (accuracy) values (to be shown as a color gradient)
     """
-    distance_list, timeout_list, max_retries_list, fitness_list = [], [], [], []
     csv_files = sorted([f for f in os.listdir(CSV_DIR) if f.endswith('.csv')])
     
     if not csv_files:
         print("No CSV files found in directory:", CSV_DIR)
         return None, None, None, None
 
-    for csv_file in csv_files:
-        filepath = os.path.join(CSV_DIR, csv_file)
-        with open(filepath, mode='r') as f:
-            reader = csv.reader(f)
-            header = next(reader)  # Skip header row
-            for row in reader:
-                try:
-                    d, t, fitness, m = row
-                    distance_list.append(float(d))
-                    timeout_list.append(float(t))
-                    fitness_list.append(float(fitness))
-                    max_retries_list.append(float(m))
-                except ValueError:
-                    print(f"Skipping invalid row in {csv_file}: {row}")
-    
-    return (np.array(distance_list), np.array(timeout_list), 
-            np.array(max_retries_list), np.array(fitness_list))
+    # Parse each file straight into a float64 array; malformed rows come back as NaN
+    data = np.vstack([
+        np.genfromtxt(os.path.join(CSV_DIR, csv_file), delimiter=',', skip_header=1,
+                      dtype=np.float64, invalid_raise=False, ndmin=2)
+        for csv_file in csv_files
+    ])
+    valid = ~np.isnan(data).any(axis=1)
+    if not valid.all():
+        print(f"Skipping {np.count_nonzero(~valid)} invalid rows")
+    data = data[valid]
+
+    distance, timeout, fitness, max_retries = data.T
+    return distance, timeout, max_retries, fitness
 
 def plot_3d_scatter(distance, timeout, max_retries, fitness):
     """
@@ -52,6 +48,11 @@ def plot_3d_scatter(distance, timeout, max_retries, fitness):
       - Z axis: max_retries
     The fitness/accuracy values are represented by the color of each point using a color gradient.
     """
+    # Thin large datasets before plotting; every point costs Python-level 3D transforms
+    if len(distance) > MAX_SCATTER_POINTS:
+        keep = np.random.default_rng().choice(len(distance), MAX_SCATTER_POINTS, replace=False)
+        distance, timeout, max_retries, fitness = distance[keep], timeout[keep], max_retries[keep], fitness[keep]
+
     fig = plt.figure(figsize=(12, 8))
     ax = fig.add_subplot(111, projection='3d')
     
@@ -1,13 +1,10 @@
 import numpy as np
-import random
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs, TIMEOUT_GRID
 
 
 # Parameters for the genetic algorithm and KEM protocol
 DISTANCE_MIN = 1   # Minimum distance (in meters)
 DISTANCE_MAX = 200  # Maximum distance (in meters)
-TIMEOUT_MIN = 1  # Minimum timeout (in ns)
-TIMEOUT_MAX = 1e9  # Maximum timeout (in ns)
 MAX_RETRIES_MIN = 1 # Minimum max_retries
 MAX_RETRIES_MAX = 10# Maximum max_retries
 NO_OF_BITS = 24     #no of bits
@@ -21,29 +18,31 @@ def evaluate_accuracy(n_bits, distance, timeout, max_retries):
     success_count = avg_100_runs(n_bits, distance, timeout, max_retries)
     return success_count
 
+rng = np.random.default_rng()  # Shared generator for chromosome creation, crossover, selection and mutation
+
 # Function to generate a random chromosome (combination of parameters)
 def create_chromosome():
-    distance = random.randint(DISTANCE_MIN, DISTANCE_MAX)  # Random distance between 50 and 500 meters
-    timeout = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)  # Random timeout between 1e10 and 1e12 ns
-    max_retries = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)  # Random max_retries between 5 and 20
+    distance = int(rng.integers(DISTANCE_MIN, DISTANCE_MAX + 1))  # Random distance between 50 and 500 meters
+    timeout = int(rng.choice(TIMEOUT_GRID))  # Random timeout from the shared log grid (1 ns to 1e9 ns)
+    max_retries = int(rng.integers(MAX_RETRIES_MIN, MAX_RETRIES_MAX + 1))  # Random max_retries between 5 and 20
     return [distance, timeout, max_retries]
 
 # Function for crossover between two parents
 def crossover(parent1, parent2):
-    crossover_point = random.randint(1, 2)  # Random crossover point between distance, timeout, max_retries
+    crossover_point = int(rng.integers(1, 3))  # Random crossover point between distance, timeout, max_retries
     offspring1 = parent1[:crossover_point] + parent2[crossover_point:]
     offspring2 = parent2[:crossover_point] + parent1[crossover_point:]
     return offspring1, offspring2
 
 # Function for mutation
 def mutate(chromosome):
-    mutation_point = random.randint(0, 2)  # Choose a parameter to mutate (distance, timeout, max_retries)
+    mutation_point = int(rng.integers(0, 3))  # Choose a parameter to mutate (distance, timeout, max_retries)
     if mutation_point == 0:  # Mutate distance
-        chromosome[0] = random.randint(DISTANCE_MIN, DISTANCE_MAX)
+        chromosome[0] = int(rng.integers(DISTANCE_MIN, DISTANCE_MAX + 1))
     elif mutation_point == 1:  # Mutate timeout
-        chromosome[1] = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)
+        chromosome[1] = int(rng.choice(TIMEOUT_GRID))
     else:  # Mutate max_retries
-        chromosome[2] = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)
+        chromosome[2] = int(rng.integers(MAX_RETRIES_MIN, MAX_RETRIES_MAX + 1))
     return chromosome
 
 # Genetic Algorithm function to optimize distance, timeout, and max_retries
@@ -76,15 +75,15 @@ def genetic_algorithm(n_bits, population_size=POPULATION_SIZE, generations=GENER
         # Crossover: Generate new population by crossover
         new_population = []
         while len(new_population) < population_size:
-            parent1, parent2 = random.sample(selected_population, 2)
+            first, second = rng.choice(len(selected_population), 2, replace=False)
+            parent1, parent2 = selected_population[first], selected_population[second]
             offspring1, offspring2 = crossover(parent1, parent2)
             new_population.append(offspring1)
             new_population.append(offspring2)
         
-        # Mutation: Apply mutation to the new population
-        for i in range(len(new_population)):
-            if random.random() < mutation_rate:
-                new_population[i] = mutate(new_population[i])
+        # Mutation: Apply mutation to the new population, drawing every decision at once
+        for i in np.flatnonzero(rng.random(len(new_population)) < mutation_rate):
+            new_population[i] = mutate(new_population[i])
         
         # Update the population with the new population
         population = new_population
@@ -2,74 +2,39 @@ import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-import random
-from multiprocessing import Pool
-from prept5 import avg_100_runs
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+from genetic_core import GENE_SCALE, create_population, evaluate_population, next_generation, top_indices
 
 # Parameters for the genetic algorithm and KEM protocol
-DISTANCE_MIN = 1   # Minimum distance (in meters)
-DISTANCE_MAX = 200  # Maximum distance (in meters)
-TIMEOUT_MIN = 1  # Minimum timeout (in ns)
-TIMEOUT_MAX = 1e9  # Maximum timeout (in ns)
-MAX_RETRIES_MIN = 1 # Minimum max_retries
-MAX_RETRIES_MAX = 10# Maximum max_retries
 NO_OF_BITS = 24     #no of bits
 POPULATION_SIZE = 20 # Size of the population
 GENERATIONS = 50    # Number of generations for the genetic algorithm
 MUTATION_RATE = 0.1 # Mutation rate
+NUM_PROCESSES = cpu_count()  # Worker processes for fitness evaluation
+PATIENCE = 10  # Generations without improvement before stopping early
+TARGET_ACCURACY = 100  # Stop as soon as a chromosome reaches this accuracy
+CONVERGENCE_THRESHOLD = 0.01  # Mean scaled gene distance at which the population counts as converged
 ACCURACY_THRESHOLD = 95  # Accuracy threshold to aim for
 
-# Store population history for visualization
-population_history = []
+# Store population history for visualization; population_history is a
+# (generations, population_size, 3) array filled in place by genetic_algorithm
+population_history = np.empty((GENERATIONS, POPULATION_SIZE, 3))
 best_fitness_history = []
 
-def evaluate_accuracy(n_bits, distance, timeout, max_retries):
-    success_count = avg_100_runs(n_bits, distance, timeout, max_retries)
-    return success_count # Return accuracy as a percentage
-
-def create_chromosome():
-    distance = random.randint(DISTANCE_MIN, DISTANCE_MAX)  # Random distance between 50 and 500 meters
-    timeout = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)  # Random timeout between 1e10 and 1e12 ns
-    max_retries = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)  # Random max_retries between 5 and 20
-    return [distance, timeout, max_retries]
-
-def crossover(parent1, parent2):
-    crossover_point = random.randint(1, 2)  # Random crossover point between distance, timeout, max_retries
-    offspring1 = parent1[:crossover_point] + parent2[crossover_point:]
-    offspring2 = parent2[:crossover_point] + parent1[crossover_point:]
-    return offspring1, offspring2
-
-# Function for mutation
-def mutate(chromosome):
-    mutation_point = random.randint(0, 2)  # Choose a parameter to mutate (distance, timeout, max_retries)
-    if mutation_point == 0:  # Mutate distance
-        chromosome[0] = random.randint(DISTANCE_MIN, DISTANCE_MAX)
-    elif mutation_point == 1:  # Mutate timeout
-        chromosome[1] = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)
-    else:  # Mutate max_retries
-        chromosome[2] = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)
-    return chromosome
-
-# Function to evaluate the fitness of a single chromosome (used for parallelization)
-def evaluate_fitness(chromosome):
-    distance, timeout, max_retries = chromosome
-    accuracy = evaluate_accuracy(NO_OF_BITS, distance, timeout, max_retries)
-    return accuracy, chromosome
-
 def compute_similarity_matrix(population):
-    """ Computes a similarity matrix based on distance between chromosomes."""
-    size = len(population)
-    similarity_matrix = np.zeros((size, size))
-    
-    for i in range(size):
-        for j in range(size):
-            similarity_matrix[i, j] = np.linalg.norm(np.array(population[i]) - np.array(population[j]))
-    
-    return similarity_matrix
+    """ Computes a similarity matrix based on distance between chromosomes.
+    Accepts one population (N, 3) or a stack of them (G, N, 3)."""
+    P = np.array(population, dtype=np.float64)
+    P[..., 1] = np.log10(P[..., 1])  # Timeouts are sampled log-uniformly, so compare them in log space
+    P /= GENE_SCALE
+    diff = P[..., :, None, :] - P[..., None, :, :]
+    return np.sqrt((diff * diff).sum(-1))
 
 def plot_population_similarity():
     """ Generates a heatmap of the population similarity matrix."""
-    avg_matrix = np.mean([compute_similarity_matrix(gen) for gen in population_history], axis=0)
+    generations_run = len(best_fitness_history)  # Fewer than allocated if the GA stopped early
+    avg_matrix = compute_similarity_matrix(population_history[:generations_run]).mean(axis=0)
     plt.figure(figsize=(10, 8))
     sns.heatmap(avg_matrix, cmap="coolwarm", annot=False)
     plt.title("Population Similarity Heatmap")
@@ -95,41 +60,48 @@ def generate_animation():
     plt.show()
 
 # Modify the genetic algorithm function to store population and best fitness history
-def genetic_algorithm(n_bits, population_size, generations, mutation_rate=MUTATION_RATE, accuracy_threshold=ACCURACY_THRESHOLD):
+def genetic_algorithm(n_bits, executor, population_size, generations, mutation_rate=MUTATION_RATE, accuracy_threshold=ACCURACY_THRESHOLD,
+                      patience=PATIENCE, target_accuracy=TARGET_ACCURACY):
     global population_history, best_fitness_history
-    population = [create_chromosome() for _ in range(population_size)]
+    population_history = np.empty((generations, population_size, 3))
+    population = create_population(population_size)
     best_solution = None
     best_accuracy = 0
+    stagnant_generations = 0
+    elite_k = max(1, population_size // 10)  # Chromosomes copied verbatim into each new generation
     
     for generation in range(generations):
         print(f"Generation {generation+1}/{generations}")
-        with Pool() as pool:
-            fitness_values = pool.map(evaluate_fitness, population)
-        
-        fitness_values.sort(reverse=True, key=lambda x: x[0])
-        if fitness_values[0][0] > best_accuracy:
-            best_accuracy = fitness_values[0][0]
-            best_solution = fitness_values[0][1]
+        # Fitness (accuracy) evaluation on the process pool; only uncached chromosomes are simulated
+        accuracies = evaluate_population(n_bits, population, executor)
+        top = top_indices(accuracies, population_size // 2)
+        if accuracies[top[0]] > best_accuracy:
+            best_accuracy = accuracies[top[0]]
+            best_solution = population[top[0]]
+            stagnant_generations = 0
+        else:
+            stagnant_generations += 1
         
         best_fitness_history.append(best_accuracy)
-        population_history.append(population[:])
-        
-        selected_population = [chromosome for _, chromosome in fitness_values[:population_size // 2]]
-        new_population = []
-        while len(new_population) < population_size:
-            parent1, parent2 = random.sample(selected_population, 2)
-            offspring1, offspring2 = crossover(parent1, parent2)
-            new_population.append(offspring1)
-            new_population.append(offspring2)
-        for i in range(len(new_population)):
-            if random.random() < mutation_rate:
-                new_population[i] = mutate(new_population[i])
+        population_history[generation] = population
+
+        # Stop once the target is reached, the best hasn't improved for `patience`
+        # generations, or the population has collapsed onto one point
+        converged = compute_similarity_matrix(population_history[generation]).mean() < CONVERGENCE_THRESHOLD
+        if best_accuracy >= target_accuracy or stagnant_generations >= patience or converged:
+            print(f"Stopped after {generation+1} of {generations} generations")
+            break
         
-        population = new_population
+        population = next_generation(population[top], population_size, elite_k, mutation_rate, generation)
     
     return best_solution, best_accuracy
 
 # After running the genetic algorithm, generate visualizations
-best_solution, best_accuracy = genetic_algorithm(n_bits=NO_OF_BITS, population_size=POPULATION_SIZE, generations=GENERATIONS)
-plot_population_similarity()
-generate_animation()
+if __name__ == "__main__":
+    # One process pool shared by every generation
+    executor = ProcessPoolExecutor(max_workers=NUM_PROCESSES)
+    best_solution, best_accuracy = genetic_algorithm(n_bits=NO_OF_BITS, population_size=POPULATION_SIZE, generations=GENERATIONS, executor=executor)
+    plot_population_similarity()
+    generate_animation()
+
+    executor.shutdown()
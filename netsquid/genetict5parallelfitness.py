@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs, quantize_params
 from multiprocessing import Pool, cpu_count
 
 # Parameter ranges
@@ -13,43 +13,89 @@ NO_OF_BITS = 24
 # Get available CPU cores and limit to 90%
 NUM_PROCESSES = max(1, int(0.9 * cpu_count()))
 
+MAX_SCATTER_POINTS = 5000  # Points drawn in the 3D landscape; larger grids are thinned
+
 # Function to evaluate accuracy (fitness) for given parameters
 def evaluate_accuracy(params):
     distance, timeout, max_retries = params
     return avg_100_runs(NO_OF_BITS, distance, timeout, max_retries)
 
-# Generate parameter grid with reduced resolution for efficiency
-def generate_parameter_grid():
-    distance_values = np.linspace(DISTANCE_MIN, DISTANCE_MAX, 10)  # Reduced from 15
-    timeout_values = np.linspace(TIMEOUT_MIN, TIMEOUT_MAX, 10)  # Reduced from 15
-    max_retries_values = np.linspace(MAX_RETRIES_MIN, MAX_RETRIES_MAX, 10)  # Reduced from 10
+# Worker wrapper that tags each result with its grid index
+def evaluate_accuracy_indexed(indexed_params):
+    index, params = indexed_params
+    return index, evaluate_accuracy(params)
+
+# Coarse-to-fine sampling: a coarse sweep first, then dense samples only around
+# the coarse points where fitness changes fastest
+COARSE_SHAPE = (10, 10, 5)  # Distance x timeout x max_retries samples in the first pass
+REFINE_SHAPE = (5, 5, 3)    # Samples per refined cell in the second pass
+REFINE_CELLS = 6            # Coarse points with the steepest fitness change to refine around
+
+# Evenly spaced values along each parameter axis
+def grid_axes(shape):
+    return (np.linspace(DISTANCE_MIN, DISTANCE_MAX, shape[0]),
+            np.linspace(TIMEOUT_MIN, TIMEOUT_MAX, shape[1]),
+            np.linspace(MAX_RETRIES_MIN, MAX_RETRIES_MAX, shape[2]))
+
+# Generate the (N, 3) float64 parameter grid spanned by the given axes, d-major. Points are
+# quantized like prept5_cached's keys, so each is plotted where it was simulated and cached
+def generate_parameter_grid(axes):
+    D, T, M = np.meshgrid(*axes, indexing='ij')
+    return np.array([quantize_params(*p) for p in zip(D.ravel(), T.ravel(), M.ravel())], dtype=np.float64)
+
+# Generate dense samples in the cells around the steepest coarse points
+def generate_refinement_grid(axes, coarse_fitness):
+    fitness = coarse_fitness.reshape(COARSE_SHAPE)
+    steepness = np.sqrt(sum(g * g for g in np.gradient(fitness))).ravel()
+    steepest = np.argsort(steepness)[::-1][:REFINE_CELLS]
+    steepest = steepest[steepness[steepest] > 0]  # A flat landscape needs no refinement
+
+    cells = []
+    for index in np.column_stack(np.unravel_index(steepest, COARSE_SHAPE)):
+        # Span the neighbouring coarse points on each axis
+        cell_axes = [np.linspace(axis[max(i - 1, 0)], axis[min(i + 1, len(axis) - 1)], n)
+                     for axis, i, n in zip(axes, index, REFINE_SHAPE)]
+        cells.append(generate_parameter_grid(cell_axes))
+    if not cells:
+        return np.empty((0, 3))
+    return np.unique(np.concatenate(cells), axis=0)
 
-    param_list = [(d, t, m) for d in distance_values for t in timeout_values for m in max_retries_values]
-    return param_list
+# Stream a set of parameter points through the pool and return their fitness
+def evaluate_grid(pool, param_list):
+    chunksize = max(1, len(param_list) // (NUM_PROCESSES * 2))
+    fitness_values = np.empty(len(param_list))
+    for i, fitness in pool.imap_unordered(evaluate_accuracy_indexed, enumerate(param_list), chunksize=chunksize):
+        fitness_values[i] = fitness
+    return fitness_values
 
-# Process in batches to reduce memory usage
 def generate_4d_fitness_landscape():
-    param_list = generate_parameter_grid()
-    batch_size = max(1, len(param_list) // (NUM_PROCESSES * 2))  # Adjust batch size for memory efficiency
+    axes = grid_axes(COARSE_SHAPE)
+    coarse = generate_parameter_grid(axes)
 
-    fitness_values = []
     with Pool(processes=NUM_PROCESSES) as pool:
-        for i in range(0, len(param_list), batch_size):
-            batch = param_list[i : i + batch_size]
-            fitness_values.extend(pool.map(evaluate_accuracy, batch))
+        coarse_fitness = evaluate_grid(pool, coarse)
+        refined = generate_refinement_grid(axes, coarse_fitness)
+        refined_fitness = evaluate_grid(pool, refined)
+    print(f"Evaluated {len(coarse)} coarse and {len(refined)} refined points")
 
     # Extract values for plotting
-    X, Y, Z, C = zip(*[(p[0], p[1], fitness_values[i], p[2]) for i, p in enumerate(param_list)])
-    return np.array(X), np.array(Y), np.array(Z), np.array(C)
+    param_list = np.concatenate([coarse, refined])
+    fitness_values = np.concatenate([coarse_fitness, refined_fitness])
+    return param_list[:, 0], param_list[:, 1], fitness_values, param_list[:, 2]
 
 # Plot the 4D fitness landscape with memory efficiency
 def plot_4d_fitness_landscape():
     X, Y, Z, C = generate_4d_fitness_landscape()
+    # Thin large grids before plotting; every point costs Python-level 3D transforms
+    if len(X) > MAX_SCATTER_POINTS:
+        keep = np.random.default_rng().choice(len(X), MAX_SCATTER_POINTS, replace=False)
+        X, Y, Z, C = X[keep], Y[keep], Z[keep], C[keep]
 
     fig = plt.figure(figsize=(10, 6))
     ax = fig.add_subplot(111, projection='3d')
 
-    sc = ax.scatter(X, Y, Z, c=C, cmap='plasma', marker='o')  # Color represents max_retries
+    # Color represents max_retries; the point cloud is embedded in the EPS as a raster
+    sc = ax.scatter(X, Y, Z, c=C, cmap='plasma', marker='o', rasterized=True)
     plt.colorbar(sc, label="Max Retries")
 
     ax.set_xlabel("Distance (m)")
@@ -57,7 +103,7 @@ def plot_4d_fitness_landscape():
     ax.set_zlabel("Fitness (Accuracy %)")
     ax.set_title("Optimized 4D Fitness Landscape (Color = Max Retries)")
 
-    plt.savefig('fitness_landscape.eps', format='eps', dpi=600)
+    plt.savefig('fitness_landscape.eps', format='eps', dpi=200)
     plt.close()
     print("Saved optimized_fitness_landscape_4d.png")
 
@@ -1,10 +1,9 @@
 import os
-import csv
 import gc
 import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs, quantize_params
 from multiprocessing import Pool, cpu_count
 
 # Only available on Unix-like systems.
@@ -35,6 +34,8 @@ NO_OF_BITS = 24
 # Get available CPU cores and limit to 90%
 NUM_PROCESSES = max(1, int(0.9 * cpu_count()))
 
+MAX_SCATTER_POINTS = 5000  # Points drawn in the 3D landscape; larger grids are thinned
+
 # Directory for CSV files
 CSV_DIR = "batches_csv"
 os.makedirs(CSV_DIR, exist_ok=True)
@@ -44,22 +45,22 @@ def evaluate_accuracy(params):
     distance, timeout, max_retries = params
     return avg_100_runs(NO_OF_BITS, distance, timeout, max_retries)
 
+# Worker wrapper that returns the parameters alongside their accuracy
+def evaluate_accuracy_with_params(params):
+    return params, evaluate_accuracy(params)
+
 # Generator function to yield batches of parameter combinations
 def generate_parameter_grid_batches(batch_size):
     distance_values = np.linspace(DISTANCE_MIN, DISTANCE_MAX, 50)
     timeout_values = np.linspace(TIMEOUT_MIN, TIMEOUT_MAX, 50)
     max_retries_values = np.linspace(MAX_RETRIES_MIN, MAX_RETRIES_MAX, 10)
     
-    batch = []
-    for d in distance_values:
-        for t in timeout_values:
-            for m in max_retries_values:
-                batch.append((d, t, m))
-                if len(batch) == batch_size:
-                    yield batch
-                    batch = []
-    if batch:
-        yield batch
+    # (N, 3) float64 grid in the same d-major order as nested loops, sliced into batches. Points
+    # are quantized like prept5_cached's keys, so each is written where it was simulated and cached
+    D, T, M = np.meshgrid(distance_values, timeout_values, max_retries_values, indexing='ij')
+    grid = np.array([quantize_params(*p) for p in zip(D.ravel(), T.ravel(), M.ravel())], dtype=np.float64)
+    for i in range(0, len(grid), batch_size):
+        yield grid[i : i + batch_size]
 
 # Process batches, evaluate fitness, write each batch to its own CSV file,
 # and force garbage collection after each batch.
@@ -67,53 +68,54 @@ def process_batches_and_write_csv():
     total_params = 20*20*10
     batch_size = max(1, total_params // (NUM_PROCESSES * 2))
     
-    batch_number = 0
-    for batch in generate_parameter_grid_batches(batch_size):
-        batch_number += 1
-        # Create a new pool for each batch with maxtasksperchild set
-        with Pool(processes=NUM_PROCESSES, maxtasksperchild=10) as pool:
-            fitness_results = pool.map(evaluate_accuracy, batch)
-        
-        csv_filename = os.path.join(CSV_DIR, f"batch_{batch_number:03d}.csv")
-        with open(csv_filename, mode='w', newline='') as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(["distance", "timeout", "fitness", "max_retries"])
-            for (d, t, m), fitness in zip(batch, fitness_results):
-                writer.writerow([d, t, fitness, m])
-        print(f"Wrote {csv_filename}")
-        
-        # Explicitly delete temporary objects and force garbage collection.
-        del batch, fitness_results
-        gc.collect()
+    # One pool for every batch: workers import prept5 once and keep it for the whole grid
+    with Pool(processes=NUM_PROCESSES) as pool:
+        batch_number = 0
+        for batch in generate_parameter_grid_batches(batch_size):
+            batch_number += 1
+            # Results carry their own parameters, so completion order doesn't matter
+            chunksize = max(1, len(batch) // (NUM_PROCESSES + 2))
+            results = list(pool.imap_unordered(evaluate_accuracy_with_params, batch, chunksize=chunksize))
+            params = np.array([p for p, _ in results], dtype=np.float64)
+            fitness = np.array([f for _, f in results], dtype=np.float64)
+
+            # Write the whole batch in one call, columns in the same order as before
+            csv_filename = os.path.join(CSV_DIR, f"batch_{batch_number:03d}.csv")
+            np.savetxt(csv_filename, np.column_stack([params[:, 0], params[:, 1], fitness, params[:, 2]]),
+                       delimiter=',', header='distance,timeout,fitness,max_retries', comments='', fmt='%.10g')
+            print(f"Wrote {csv_filename}")
+            
+            # Explicitly delete temporary objects and force garbage collection.
+            del batch, results, params, fitness
+            gc.collect()
 
 
 # Read all CSV files and aggregate the data for plotting
 def generate_4d_fitness_landscape_from_csv():
-    X_list, Y_list, Z_list, C_list = [], [], [], []
     csv_files = sorted([f for f in os.listdir(CSV_DIR) if f.endswith('.csv')])
     
-    for csv_file in csv_files:
-        filepath = os.path.join(CSV_DIR, csv_file)
-        with open(filepath, mode='r') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header row
-            for row in reader:
-                d, t, fitness, m = row
-                X_list.append(float(d))
-                Y_list.append(float(t))
-                Z_list.append(float(fitness))
-                C_list.append(float(m))
+    # Parse each file straight into a float64 array instead of row by row
+    data = np.vstack([
+        np.loadtxt(os.path.join(CSV_DIR, csv_file), delimiter=',', skiprows=1, dtype=np.float64, ndmin=2)
+        for csv_file in csv_files
+    ])
     
-    return np.array(X_list), np.array(Y_list), np.array(Z_list), np.array(C_list)
+    d, t, fitness, m = data.T
+    return d, t, fitness, m
 
 # Plot the 4D fitness landscape with color representing max_retries
 def plot_4d_fitness_landscape_from_csv():
     X, Y, Z, C = generate_4d_fitness_landscape_from_csv()
+    # Thin large grids before plotting; every point costs Python-level 3D transforms
+    if len(X) > MAX_SCATTER_POINTS:
+        keep = np.random.default_rng().choice(len(X), MAX_SCATTER_POINTS, replace=False)
+        X, Y, Z, C = X[keep], Y[keep], Z[keep], C[keep]
     
     fig = plt.figure(figsize=(10, 6))
     ax = fig.add_subplot(111, projection='3d')
     
-    sc = ax.scatter(X, Y, Z, c=C, cmap='plasma', marker='o')
+    # The point cloud is embedded in the EPS as a raster; axes and labels stay vector
+    sc = ax.scatter(X, Y, Z, c=C, cmap='plasma', marker='o', rasterized=True)
     plt.colorbar(sc, label="Max Retries")
     
     ax.set_xlabel("Distance (m)")
@@ -121,7 +123,7 @@ def plot_4d_fitness_landscape_from_csv():
     ax.set_zlabel("Fitness (Accuracy %)")
     ax.set_title("Optimized 4D Fitness Landscape (Color = Max Retries)")
     
-    plt.savefig('fitness_landscape.eps', format='eps', dpi=600)
+    plt.savefig('fitness_landscape.eps', format='eps', dpi=200)
     plt.close()
     print("Saved optimized_fitness_landscape_4d.png")
 
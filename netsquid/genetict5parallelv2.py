@@ -1,14 +1,12 @@
+import os
 import numpy as np
-import random
 from joblib import Parallel, delayed
-from prept5 import avg_100_runs
+from prept5_cached import avg_100_runs_batch, lookup, quantize_params, TIMEOUT_GRID
 
 
 # Parameters for the genetic algorithm and KEM protocol
 DISTANCE_MIN = 1   # Minimum distance (in meters)
 DISTANCE_MAX = 200  # Maximum distance (in meters)
-TIMEOUT_MIN = 1  # Minimum timeout (in ns)
-TIMEOUT_MAX = 1e9  # Maximum timeout (in ns)
 MAX_RETRIES_MIN = 1 # Minimum max_retries
 MAX_RETRIES_MAX = 10# Maximum max_retries
 NO_OF_BITS = 24     #no of bits
@@ -16,79 +14,81 @@ POPULATION_SIZE = 20# Size of the population
 GENERATIONS = 20    # Number of generations for the genetic algorithm
 MUTATION_RATE = 0.1 # Mutation rate
 ACCURACY_THRESHOLD = 95  # Accuracy threshold to aim for
+NUM_BATCHES = os.cpu_count()  # Uncached chromosomes are split into one simulator batch per worker
 
-# Function to evaluate the accuracy based on the current parameters
-def evaluate_accuracy(n_bits, distance, timeout, max_retries):
-    success_count = avg_100_runs(n_bits, distance, timeout, max_retries)
-    accuracy = (success_count / 100) * 100  # Return accuracy as a percentage
-    return accuracy
+# Function to evaluate the accuracy of every parameter tuple in one simulator run
+def evaluate_accuracy_batch(n_bits, param_list):
+    success_counts = avg_100_runs_batch(n_bits, param_list)
+    accuracies = (success_counts / 100) * 100  # Return accuracy as a percentage
+    return accuracies.tolist()
 
-# Function to generate a random chromosome (combination of parameters)
-def create_chromosome():
-    distance = random.randint(DISTANCE_MIN, DISTANCE_MAX)  # Random distance between 50 and 500 meters
-    timeout = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)  # Random timeout between 1e10 and 1e12 ns
-    max_retries = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)  # Random max_retries between 5 and 20
-    return [distance, timeout, max_retries]
+rng = np.random.default_rng()  # Shared generator for population creation, crossover and mutation
 
-# Function for crossover between two parents
-def crossover(parent1, parent2):
-    crossover_point = random.randint(1, 2)  # Random crossover point between distance, timeout, max_retries
-    offspring1 = parent1[:crossover_point] + parent2[crossover_point:]
-    offspring2 = parent2[:crossover_point] + parent1[crossover_point:]
-    return offspring1, offspring2
+# Function to generate a random population as a (size, 3) array of
+# [distance, timeout, max_retries] rows
+def create_population(size):
+    population = np.empty((size, 3))
+    population[:, 0] = rng.integers(DISTANCE_MIN, DISTANCE_MAX + 1, size)
+    population[:, 1] = rng.choice(TIMEOUT_GRID, size)  # Timeouts only take values on the shared log grid
+    population[:, 2] = rng.integers(MAX_RETRIES_MIN, MAX_RETRIES_MAX + 1, size)
+    return population
 
-# Function for mutation
-def mutate(chromosome):
-    mutation_point = random.randint(0, 2)  # Choose a parameter to mutate (distance, timeout, max_retries)
-    if mutation_point == 0:  # Mutate distance
-        chromosome[0] = random.randint(DISTANCE_MIN, DISTANCE_MAX)
-    elif mutation_point == 1:  # Mutate timeout
-        chromosome[1] = random.uniform(TIMEOUT_MIN, TIMEOUT_MAX)
-    else:  # Mutate max_retries
-        chromosome[2] = random.randint(MAX_RETRIES_MIN, MAX_RETRIES_MAX)
-    return chromosome
+# Function for roulette-wheel selection: draws indices with probability proportional
+# to fitness by searching the cumulative fitness (uniformly if every fitness is zero)
+def roulette_select(fitness, size):
+    cdf = np.cumsum(fitness, dtype=np.float64)
+    if cdf[-1] <= 0:
+        return rng.integers(0, len(fitness), size)
+    return np.searchsorted(cdf, rng.random(size) * cdf[-1], side='right')
 
-# Function to evaluate the fitness of a single chromosome
-def evaluate_fitness(chromosome, n_bits=NO_OF_BITS):
-    distance, timeout, max_retries = chromosome
-    accuracy = evaluate_accuracy(n_bits, distance, timeout, max_retries)
-    return accuracy, chromosome
+# Function for crossover: offspring i takes the genes before a random point (after
+# distance or after timeout) from first_parents[i] and the rest from second_parents[i]
+def crossover(first_parents, second_parents):
+    crossover_point = rng.integers(1, 3, size=(len(first_parents), 1))
+    return np.where(np.arange(3) < crossover_point, first_parents, second_parents)
+
+# Function for mutation: each chromosome has one random gene redrawn with
+# probability mutation_rate (in place)
+def mutate(population, mutation_rate):
+    rows = np.flatnonzero(rng.random(len(population)) < mutation_rate)
+    genes = rng.integers(0, 3, size=len(rows))
+    population[rows, genes] = create_population(len(rows))[np.arange(len(rows)), genes]
+    return population
 
 # Genetic Algorithm function to optimize distance, timeout, and max_retries
-def genetic_algorithm(n_bits, population_size=POPULATION_SIZE, generations=GENERATIONS, mutation_rate=MUTATION_RATE, accuracy_threshold=ACCURACY_THRESHOLD):
-    population = [create_chromosome() for _ in range(population_size)]
+def genetic_algorithm(n_bits, parallel, population_size=POPULATION_SIZE, generations=GENERATIONS, mutation_rate=MUTATION_RATE, accuracy_threshold=ACCURACY_THRESHOLD):
+    population = create_population(population_size)
     best_solution = None
     best_accuracy = 0
     
     for generation in range(generations):
         print(f"Generation {generation+1}/{generations}")
         
-        # Parallelize fitness evaluation using Joblib
-        fitness_values = Parallel(n_jobs=-1)(delayed(evaluate_fitness)(chromosome) for chromosome in population)
-        
-        # Sort the population by fitness (accuracy)
-        fitness_values.sort(reverse=True, key=lambda x: x[0])
+        # Parallelize fitness evaluation using Joblib, only for distinct chromosomes
+        # the shared prept5_cached store doesn't have yet
+        uncached = [key for key in dict.fromkeys(quantize_params(*chromosome) for chromosome in population)
+                    if lookup(n_bits, key, 100) is None]
+        if uncached:
+            # Each worker simulates its share of the chromosomes as one batch and stores the results
+            batches = [uncached[i::NUM_BATCHES] for i in range(min(NUM_BATCHES, len(uncached)))]
+            parallel(delayed(evaluate_accuracy_batch)(n_bits, batch) for batch in batches)
+        # Every chromosome is cached now, so this only reads the store
+        fitness = np.array(evaluate_accuracy_batch(n_bits, population))
         
         # Update the best solution
-        if fitness_values[0][0] > best_accuracy:
-            best_accuracy = fitness_values[0][0]
-            best_solution = fitness_values[0][1]
+        best = np.argmax(fitness)
+        if fitness[best] > best_accuracy:
+            best_accuracy = fitness[best]
+            best_solution = population[best]
         
-        # Selection: Select the top 50% of the population based on fitness
-        selected_population = [chromosome for _, chromosome in fitness_values[:population_size // 2]]
+        # Selection: draw both parents of every offspring at once, proportional to fitness
+        parents = roulette_select(fitness, (population_size, 2))
         
         # Crossover: Generate new population by crossover
-        new_population = []
-        while len(new_population) < population_size:
-            parent1, parent2 = random.sample(selected_population, 2)
-            offspring1, offspring2 = crossover(parent1, parent2)
-            new_population.append(offspring1)
-            new_population.append(offspring2)
+        new_population = crossover(population[parents[:, 0]], population[parents[:, 1]])
         
         # Mutation: Apply mutation to the new population
-        for i in range(len(new_population)):
-            if random.random() < mutation_rate:
-                new_population[i] = mutate(new_population[i])
+        new_population = mutate(new_population, mutation_rate)
         
         # Update the population with the new population
         population = new_population
@@ -97,7 +97,9 @@ def genetic_algorithm(n_bits, population_size=POPULATION_SIZE, generations=GENER
     return best_solution, best_accuracy
 
 # Run the genetic algorithm to optimize the parameters
-best_solution, best_accuracy = genetic_algorithm(n_bits=NO_OF_BITS, population_size=POPULATION_SIZE, generations=GENERATIONS)
+# One set of loky workers shared by every generation, so prept5 is imported once per worker
+with Parallel(n_jobs=-1, backend='loky', batch_size='auto', prefer='processes') as parallel:
+    best_solution, best_accuracy = genetic_algorithm(n_bits=NO_OF_BITS, parallel=parallel, population_size=POPULATION_SIZE, generations=GENERATIONS)
 
 print(f"Best solution: Distance = {best_solution[0]} meters, Timeout = {best_solution[1]} ns, Max Retries = {best_solution[2]}")
 print(f"Best accuracy: {best_accuracy}%")
@@ -1,10 +1,19 @@
 import numpy as np
-from prept5 import avg_100_runs
+import math
+import itertools
+import logging
+from prept5_cached import count_successes, TIMEOUT_GRID
 
 NO_OF_BITS=24
+RUNGS = [10, 30, 100]  # Runs per configuration at each successive-halving rung; the last rung is the full 100
+ETA = 3  # Only the top 1/ETA of each rung's configurations move on to the next
 
-# Define the grid search function
-def grid_search(n_bits, distance_range, timeout_range, max_retries_range, accuracy_threshold=95):
+# Per-configuration progress goes to debug so the search loop doesn't pay for a print per cell
+logger = logging.getLogger(__name__)
+
+# Define the grid search function: successive halving screens every configuration with
+# a few runs and only re-runs the most accurate 1/eta with more, up to 100 runs
+def grid_search(n_bits, distance_range, timeout_range, max_retries_range, accuracy_threshold=95, rungs=RUNGS, eta=ETA):
     best_distance = None
     best_timeout = None
     best_max_retries = None
@@ -13,26 +22,37 @@ def grid_search(n_bits, distance_range, timeout_range, max_retries_range, accura
     # Keep track of results in a dictionary for logging
     results = {}
 
-    # Iterate over all combinations of distance, timeout, and max_retries
-    for distance in distance_range:
-        for timeout in timeout_range:
-            for max_retries in max_retries_range:
-                print(f"Testing with Distance={distance}, Timeout={timeout}, Max Retries={max_retries}")
+    # Every combination of distance, timeout, and max_retries enters the first rung
+    configs = list(itertools.product(distance_range, timeout_range, max_retries_range))
+    for rung, n_runs in enumerate(rungs):
+        print(f"Rung {rung+1}/{len(rungs)}: {len(configs)} configurations x {n_runs} runs")
+        scored = []
+        for distance, timeout, max_retries in configs:
+            logger.debug("Testing with Distance=%s, Timeout=%s, Max Retries=%s over %d runs", distance, timeout, max_retries, n_runs)
+
+            # Run the simulations and get accuracy as a percentage; on the last rung only the
+            # threshold matters, so stop a configuration as soon as it can no longer reach it
+            early_stop_threshold = math.ceil(accuracy_threshold * n_runs / 100) if rung == len(rungs) - 1 else None
+            accuracy = 100 * count_successes(n_bits, distance, timeout, max_retries, n_runs, early_stop_threshold) / n_runs
+            scored.append((accuracy, (distance, timeout, max_retries)))
 
-                # Run the average function and get accuracy
-                accuracy = avg_100_runs(n_bits, distance, timeout, max_retries)
+        # Keep the top 1/eta by accuracy for the next rung
+        if rung < len(rungs) - 1:
+            scored.sort(reverse=True, key=lambda x: x[0])
+            configs = [config for _, config in scored[:max(1, math.ceil(len(configs) / eta))]]
 
-                # Only keep configurations with accuracy above the threshold
-                if accuracy >= accuracy_threshold:
-                    # Store results for logging
-                    results[(distance, timeout, max_retries)] = accuracy
+    # Only keep the survivors' configurations with accuracy above the threshold
+    for accuracy, (distance, timeout, max_retries) in scored:
+        if accuracy >= accuracy_threshold:
+            # Store results for logging
+            results[(distance, timeout, max_retries)] = accuracy
 
-                    # Update the best configuration if we find a better one
-                    if accuracy > best_accuracy:
-                        best_accuracy = accuracy
-                        best_distance = distance
-                        best_timeout = timeout
-                        best_max_retries = max_retries
+            # Update the best configuration if we find a better one
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_distance = distance
+                best_timeout = timeout
+                best_max_retries = max_retries
 
     # Print the best configuration found
     print("\nBest Configuration:")
@@ -45,7 +65,7 @@ def grid_search(n_bits, distance_range, timeout_range, max_retries_range, accura
 
 # Set ranges for grid search
 distance_range = np.arange(50, 501, 50)  # Distance from 50 to 500 in steps of 50 meters
-timeout_range = np.logspace(10, 12, num=3)  # Timeout from 1e10 ns to 1e12 ns
+timeout_range = TIMEOUT_GRID  # Timeout from 1 ns to 1e9 ns on the shared 30-point log grid
 max_retries_range = np.arange(5, 21, 5)  # Max retries from 5 to 20 in steps of 5
 
 # Run the grid search
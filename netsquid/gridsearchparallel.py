@@ -1,11 +1,66 @@
+import os
+# One BLAS/OpenMP thread per process, set before numpy loads so the workers inherit it;
+# the process pool already uses every spare core
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
 import numpy as np
+import math
+import heapq
+import itertools
 import concurrent.futures
+import logging
 from functools import partial
-from prept5 import avg_100_runs
+from operator import itemgetter
+import prept5
+from prept5_cached import count_successes_batch, TIMEOUT_GRID
 
 NO_OF_BITS=24
+BATCH_SIZE = 8  # Configurations simulated together per task; each costs up to 100 runs, so small batches balance best
+RUNGS = [10, 30, 100]  # Runs per configuration at each successive-halving rung; the last rung is the full 100
+ETA = 3  # Only the top 1/ETA of each rung's configurations move on to the next
+NUM_WORKERS = max(1, os.cpu_count() - 1)  # Leave one core for the dispatching parent
+MAX_PENDING = 2 * NUM_WORKERS  # Batches in flight at once; enough to keep every worker busy
 
-def grid_search_parallel(n_bits, distance_range, timeout_range, max_retries_range, accuracy_threshold=95):
+# Per-batch progress goes to the worker-local logger at debug level instead of a print per task
+logger = logging.getLogger(__name__)
+
+# Helper function to score a batch of (distance, timeout, max_retries) configurations over
+# n_runs runs each in one simulator run; defined at module level so ProcessPoolExecutor can pickle it
+def evaluate_configs(configs, n_bits, n_runs):
+    accuracies = 100 * count_successes_batch(n_bits, configs, n_runs) / n_runs
+    if logger.isEnabledFor(logging.DEBUG):
+        for config, accuracy in zip(configs, accuracies):
+            logger.debug("Distance=%s, Timeout=%s, Max Retries=%s over %d runs -> %.1f%%", *config, n_runs, accuracy)
+    return list(zip(accuracies.tolist(), configs))
+
+# Worker initializer: one throwaway exchange so NetSquid and liboqs are loaded and
+# warmed up before the first timed batch
+def warm_worker():
+    prept5.run_bb84_kem(NO_OF_BITS, 50, 1e6, 3)
+
+# Function to group an iterable into lists of up to `size` items without materializing it
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+# Function to run fn over the batches with at most MAX_PENDING futures in flight, yielding
+# results as they complete. Executor.map would submit every batch up front, so the whole
+# grid would exist as pending futures; here the next batch is only drawn when one finishes.
+def bounded_map(executor, fn, batches, max_pending=MAX_PENDING):
+    pending = set()
+    for batch in batches:
+        if len(pending) >= max_pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+        pending.add(executor.submit(fn, batch))
+    for future in concurrent.futures.as_completed(pending):
+        yield future.result()
+
+# Successive halving over the grid: every configuration is screened with a few runs
+# and only the most accurate 1/eta are re-run with more, up to 100 runs
+def grid_search_parallel(n_bits, distance_range, timeout_range, max_retries_range, accuracy_threshold=95, rungs=RUNGS, eta=ETA):
     best_distance = None
     best_timeout = None
     best_max_retries = None
@@ -14,38 +69,33 @@ def grid_search_parallel(n_bits, distance_range, timeout_range, max_retries_rang
     # Store results in a dictionary for logging
     results = {}
 
-    # Helper function to evaluate each configuration
-    def evaluate_config(distance, timeout, max_retries):
-        print(f"Testing with Distance={distance}, Timeout={timeout}, Max Retries={max_retries}")
-        accuracy = avg_100_runs(n_bits, distance, timeout, max_retries)
-        
-        # Only return the config if the accuracy is above the threshold
-        if accuracy >= accuracy_threshold:
-            return (distance, timeout, max_retries, accuracy)
-        return None
-
-    # Create a list of all configurations to test
-    config_list = [(distance, timeout, max_retries) 
-                   for distance in distance_range 
-                   for timeout in timeout_range 
-                   for max_retries in max_retries_range]
-
-    # Use ThreadPoolExecutor or ProcessPoolExecutor to parallelize
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        # We use partial to provide n_bits argument to the helper function
-        results_future = list(executor.map(partial(evaluate_config, n_bits=n_bits), *zip(*config_list)))
-
-    # Filter out any None results (those that didn't meet the accuracy threshold)
-    valid_results = [result for result in results_future if result is not None]
-
-    # Find the best result (maximizing distance and accuracy)
-    for distance, timeout, max_retries, accuracy in valid_results:
-        results[(distance, timeout, max_retries)] = accuracy
-        if accuracy > best_accuracy:
-            best_accuracy = accuracy
-            best_distance = distance
-            best_timeout = timeout
-            best_max_retries = max_retries
+    # Stream the first rung's configurations instead of building the whole grid in memory
+    configs = itertools.product(distance_range, timeout_range, max_retries_range)
+    n_configs = len(distance_range) * len(timeout_range) * len(max_retries_range)
+
+    # One process pool shared by every rung
+    with concurrent.futures.ProcessPoolExecutor(max_workers=NUM_WORKERS, initializer=warm_worker) as executor:
+        for rung, n_runs in enumerate(rungs):
+            print(f"Rung {rung+1}/{len(rungs)}: {n_configs} configurations x {n_runs} runs")
+            scored = itertools.chain.from_iterable(
+                bounded_map(executor, partial(evaluate_configs, n_bits=n_bits, n_runs=n_runs), batched(configs, BATCH_SIZE)))
+            if rung == len(rungs) - 1:
+                break
+            # Keep the top 1/eta by accuracy for the next rung
+            n_configs = max(1, math.ceil(n_configs / eta))
+            configs = [config for _, config in heapq.nlargest(n_configs, scored, key=itemgetter(0))]
+
+        # Find the best result among the survivors' full runs, keeping only
+        # configurations that meet the accuracy threshold
+        for accuracy, (distance, timeout, max_retries) in scored:
+            if accuracy < accuracy_threshold:
+                continue
+            results[(distance, timeout, max_retries)] = accuracy
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_distance = distance
+                best_timeout = timeout
+                best_max_retries = max_retries
 
     # Print the best configuration found
     print("\nBest Configuration:")
@@ -56,21 +106,24 @@ def grid_search_parallel(n_bits, distance_range, timeout_range, max_retries_rang
     return best_distance, best_timeout, best_max_retries, best_accuracy, results
 
 
-# Set ranges for grid search
-distance_range = np.arange(1, 200, 1)  # Distance from 50 to 500 in steps of 50 meters
-timeout_range = np.arange(1, 1e9 + 1 - 100, 100)  # Timeout from 1e10 ns to 1e12 ns
-max_retries_range = np.arange(1, 11, 1)  # Max retries from 5 to 20 in steps of 5
-
-# Run the parallel grid search
-best_distance, best_timeout, best_max_retries, best_accuracy, results = grid_search_parallel(
-    n_bits=NO_OF_BITS, 
-    distance_range=distance_range, 
-    timeout_range=timeout_range, 
-    max_retries_range=max_retries_range,
-    accuracy_threshold=95
-)
-
-# Optional: Print all results for comparison
-#print("\nAll tested configurations and their accuracy:")
-#for config, accuracy in results.items():
-#    print(f"Distance={config[0]}, Timeout={config[1]}, Max Retries={config[2]} -> Accuracy={accuracy}%")
+# Worker processes may re-import this module (spawn start method), so only the parent
+# runs the search
+if __name__ == "__main__":
+    # Set ranges for grid search
+    distance_range = np.arange(1, 200, 1)  # Distance from 50 to 500 in steps of 50 meters
+    timeout_range = TIMEOUT_GRID  # Timeout from 1 ns to 1e9 ns on the shared 30-point log grid
+    max_retries_range = np.arange(1, 11, 1)  # Max retries from 5 to 20 in steps of 5
+
+    # Run the parallel grid search
+    best_distance, best_timeout, best_max_retries, best_accuracy, results = grid_search_parallel(
+        n_bits=NO_OF_BITS, 
+        distance_range=distance_range, 
+        timeout_range=timeout_range, 
+        max_retries_range=max_retries_range,
+        accuracy_threshold=95
+    )
+
+    # Optional: Print all results for comparison
+    #print("\nAll tested configurations and their accuracy:")
+    #for config, accuracy in results.items():
+    #    print(f"Distance={config[0]}, Timeout={config[1]}, Max Retries={config[2]} -> Accuracy={accuracy}%")
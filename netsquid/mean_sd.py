@@ -1,23 +1,31 @@
 import numpy as np
 import re
 
-# Option 1: Custom parsing approach
-with open('LAB_results.txt', 'r') as file:
-    lines = file.readlines()
-    
-# Extract numbers from each line using regex
-data = []
-for line in lines:
-    # Remove brackets and extract numbers
-    numbers = re.findall(r'\d+', line)
-    data.append([int(num) for num in numbers])
+# Option 1: Custom parsing approach, streamed with Welford's single-pass algorithm so
+# memory stays at one row no matter how long the log is
+NUMBER_PATTERN = re.compile(rb'\d+')
 
-# Convert to numpy array
-data = np.array(data)
-print(data.shape)
+count = 0
+mean_values = None
+m2 = None
+with open('LAB_results.txt', 'rb') as file:
+    for line in file:
+        # Remove brackets and extract numbers
+        numbers = NUMBER_PATTERN.findall(line)
+        if not numbers:
+            continue
+        x = np.array([int(n) for n in numbers], dtype=np.float64)
+        if mean_values is None:
+            mean_values = np.zeros_like(x)
+            m2 = np.zeros_like(x)
+        count += 1
+        delta = x - mean_values
+        mean_values += delta / count
+        m2 += delta * (x - mean_values)
 
-mean_values = np.mean(data, axis=0)
-std_dev_values = np.std(data, axis=0)
+print((count, len(mean_values)))
+
+std_dev_values = np.sqrt(m2 / count)  # Population standard deviation, as np.std gives
 
 for i in range(1):
     print(f"{round(mean_values[i], 2)} +- {round(std_dev_values[i], 2)}")
@@ -1,62 +1,64 @@
+import os
 import gym
 from gym import spaces
 import numpy as np
 from stable_baselines3 import PPO
 from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.vec_env import DummyVecEnv
-from prept5 import avg_100_runs
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from prept5_cached import avg_100_runs, TIMEOUT_GRID, timeout_index
 
 NO_OF_BITS = 24  # From original code
+NUM_ENVS = os.cpu_count()  # Environments stepped in parallel, one subprocess each
+ROLLOUT_STEPS = 1024  # Steps collected per PPO update, shared across the environments
+PRINT_EVERY = 100  # Steps between progress prints from each environment
+# [distance, timeout grid index, retries] per-step action scale and bounds
+ACTION_SCALE = np.array([20, 1, 1])  # Max ±20 m, ±1 TIMEOUT_GRID step and ±1 retries change
+STATE_LOW = np.array([1, 0, 1])
+STATE_HIGH = np.array([200, len(TIMEOUT_GRID) - 1, 10])
+OBS_LOW = STATE_LOW
+OBS_RANGE = STATE_HIGH - STATE_LOW
 
 class BB84Env(gym.Env):
-    def __init__(self):
+    def __init__(self, seed=None):
         super(BB84Env, self).__init__()
+        self.rng = np.random.default_rng(seed)  # Per-environment generator so parallel envs don't start identically
+        self.step_count = 0
         self.action_space = spaces.Box(low=-1.0, high=1.0, shape=(3,), dtype=np.float32)
         self.observation_space = spaces.Box(low=0.0, high=1.0, shape=(3,), dtype=np.float32)
         
         # Initialize state variables with realistic starting values
         self.current_distance = 50.0  # Start with moderate distance
-        self.current_timeout = 1e6    # Initial timeout 1ms (1e6 ns)
+        self.timeout_index = timeout_index(1e6)  # Initial timeout: the grid point nearest 1 ms (788046 ns), as a TIMEOUT_GRID index
+        self.current_timeout = int(TIMEOUT_GRID[self.timeout_index])
         self.current_retries = 3      # Moderate retry count
 
     def _normalize_state(self):
         """Normalize state parameters to [0,1] range"""
-        return np.array([
-            (self.current_distance - 1) / 199,
-            (self.current_timeout - 1e4) / (1e9 - 1e4),
-            (self.current_retries - 1) / 9
-        ], dtype=np.float32)
+        state = np.array([self.current_distance, self.timeout_index, self.current_retries])
+        return ((state - OBS_LOW) / OBS_RANGE).astype(np.float32)
 
     def reset(self):
         # Reset to initial values with small random variations
-        self.current_distance = np.clip(50 + np.random.randint(-10, 10), 1, 200)
-        self.current_timeout = np.clip(1e6 + np.random.randint(-1e5, 1e5), 1e4, 1e9)
-        self.current_retries = np.clip(3 + np.random.randint(-1, 2), 1, 10)
+        self.current_distance = np.clip(50 + self.rng.integers(-10, 10), 1, 200)
+        # Jitter by one grid step either way; a +/-1e5 ns jitter around 1 ms always snapped to the same point
+        self.timeout_index = int(np.clip(timeout_index(1e6) + self.rng.integers(-1, 2), 0, len(TIMEOUT_GRID) - 1))
+        self.current_timeout = int(TIMEOUT_GRID[self.timeout_index])
+        self.current_retries = np.clip(3 + self.rng.integers(-1, 2), 1, 10)
         return self._normalize_state()
 
     def step(self, action):
-        # Convert normalized actions to parameter changes
-        delta_distance = action[0] * 20  # Max ±20 m change
-        delta_timeout = action[1] * 5e4   # Max ±5e4 ns change
-        delta_retries = action[2] * 1     # Max ±1 retries change
-
-        # Update parameters with clamping
-        self.current_distance = np.clip(
-            self.current_distance + delta_distance, 1, 200
-        )
-        self.current_timeout = np.clip(
-            self.current_timeout + delta_timeout, 1, 1e9
-        )
-        self.current_retries = np.clip(
-            self.current_retries + delta_retries, 1, 10
-        )
+        # Convert normalized actions to parameter changes and update all three
+        # parameters at once with clamping; the timeout moves along TIMEOUT_GRID
+        state = np.array([self.current_distance, self.timeout_index, self.current_retries])
+        state = np.clip(state + action * ACTION_SCALE, STATE_LOW, STATE_HIGH)
 
         # Round to valid values
-        self.current_distance = int(round(self.current_distance))
-        self.current_timeout = int(round(self.current_timeout / 100) * 100)
-        self.current_retries = int(round(self.current_retries))
+        self.current_distance, self.timeout_index, self.current_retries = np.round(state).astype(np.int64).tolist()
+        self.current_timeout = int(TIMEOUT_GRID[self.timeout_index])
 
-        print(f"distance: {self.current_distance}, timeout: {self.current_timeout}, retiries: {self.current_retries}")
+        self.step_count += 1
+        if self.step_count % PRINT_EVERY == 0:
+            print(f"step {self.step_count}: distance: {self.current_distance}, timeout: {self.current_timeout}, retiries: {self.current_retries}")
         # Get simulation results
         success_count = avg_100_runs(
             NO_OF_BITS,
@@ -75,38 +77,44 @@ class BB84Env(gym.Env):
 
         return self._normalize_state(), reward, done, {}
 
-# Create and wrap environment
-env = DummyVecEnv([lambda: BB84Env()])
-
-# Configure PPO model
-model = PPO(
-    "MlpPolicy",
-    env,
-    verbose=1,
-    learning_rate=0.0003,
-    n_steps=1024,
-    batch_size=64,
-    tensorboard_log="./bb84_ppo_logs/"
-)
-
-# Train the model
-try:
-    model.learn(total_timesteps=100, progress_bar=True)
-except KeyboardInterrupt:
-    print("Training interrupted")
-
-# Save the trained model
-#model.save("bb84_ppo_model")
-
-# Example of using the trained model
-trained_model = PPO.load("bb84_ppo_model")
-obs = env.reset()
-
-for _ in range(10):
-    action, _ = trained_model.predict(obs)
-    obs, rewards, _, _ = env.step(action)
-    state = env.envs[0]
-    print(f"Distance: {state.current_distance} m, "
-          f"Timeout: {state.current_timeout} ns, "
-          f"Retries: {state.current_retries}, "
-          f"Reward: {rewards[0]:.2f}")
\ No newline at end of file
+# Subprocess environments re-import this module, so only the parent trains
+if __name__ == "__main__":
+    # Create and wrap environments; each runs its simulations in its own process
+    env = SubprocVecEnv([lambda i=i: BB84Env(seed=i) for i in range(NUM_ENVS)])
+
+    # Configure PPO model (n_steps is per environment)
+    model = PPO(
+        "MlpPolicy",
+        env,
+        verbose=1,
+        learning_rate=0.0003,
+        n_steps=max(1, ROLLOUT_STEPS // NUM_ENVS),
+        batch_size=64,
+        tensorboard_log="./bb84_ppo_logs/"
+    )
+
+    # Train the model
+    try:
+        model.learn(total_timesteps=100, progress_bar=True)
+    except KeyboardInterrupt:
+        print("Training interrupted")
+
+    # Save the trained model
+    #model.save("bb84_ppo_model")
+
+    # Example of using the trained model
+    trained_model = PPO.load("bb84_ppo_model")
+    obs = env.reset()
+
+    for _ in range(10):
+        action, _ = trained_model.predict(obs)
+        obs, rewards, _, _ = env.step(action)
+        # Environment state lives in the subprocesses, so read it back from the first one
+        distance, timeout, retries = (env.get_attr(name, indices=0)[0]
+                                      for name in ("current_distance", "current_timeout", "current_retries"))
+        print(f"Distance: {distance} m, "
+              f"Timeout: {timeout} ns, "
+              f"Retries: {retries}, "
+              f"Reward: {rewards[0]:.2f}")
+
+    env.close()
@@ -8,17 +8,20 @@ from netsquid.protocols import Protocol
 from netsquid.qubits import qubitapi as qapi
 import oqs
 import warnings
-import random
+import os
+from multiprocessing import Pool
+
+try:
+    # Cython XOR loop; build with `python setup.py build_ext --inplace`.
+    from fastxor import xor_cycle
+except ImportError:
+    xor_cycle = None
 
 # Suppress all warnings
 warnings.filterwarnings('ignore')
 
 # Set seeds for reproducibility
 #np.random.seed(2005)
-#random.seed(2005)
-
-# Global variable to store the shared secret
-GLOBAL_SHARED_SECRET = None
 
 # parameters (fixed)
 SPEED_LIGHT_VACUUM = 300000  # km/s (3e8 m/s)
@@ -31,6 +34,18 @@ DISTANCE = 100  # meters
 TIMEOUT = 10e10  # ns
 MAX_RETRIES = 10
 
+# Operator preparing each BB84 state, indexed [bit][basis bit] (basis bit 0 = 'X', 1 = 'Z'):
+# |0> needs none, |1> = X|0>, |+> = H|0> and |-> = HX|0> as one combined operator
+ENCODING_OPS = ((ns.H, None), (ns.H * ns.X, ns.X))
+
+def xor_with_key(data, key_bytes):
+    """XOR data with key_bytes repeated to its length, as one big-integer XOR without fastxor."""
+    if xor_cycle is not None:
+        return xor_cycle(data, key_bytes)
+    datalen = len(data)
+    key = (key_bytes * (datalen // len(key_bytes) + 1))[:datalen]
+    return (int.from_bytes(data, 'little') ^ int.from_bytes(key, 'little')).to_bytes(datalen, 'little')
+
 class Kyber:
     def __init__(self, algorithm="Kyber768"):
         """Initialize Kyber with a persistent KEM instance."""
@@ -62,34 +77,39 @@ class Kyber:
         Returns the encrypted message, the encapsulated key (ciphertext), and the shared secret.
         """
         ciphertext, shared_secret = self.encapsulate(public_key)
-        key_bytes = shared_secret
-        encrypted = bytearray()
-        for i, byte in enumerate(plaintext):
-            encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(encrypted), ciphertext, shared_secret
+        return xor_with_key(plaintext, shared_secret), ciphertext, shared_secret
 
     def decrypt(self, ciphertext, encapsulated_key):
         """Standard decryption using decapsulation (not used in Bob now)."""
         shared_secret = self.kem.decap_secret(encapsulated_key)
-        key_bytes = shared_secret
-        decrypted = bytearray()
-        for i, byte in enumerate(ciphertext):
-            decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(decrypted), shared_secret
+        return xor_with_key(ciphertext, shared_secret), shared_secret
+
+# Bob's Kyber instance and key pair per algorithm, built once per process and shared by every
+# run; the key pair lives inside the liboqs object, so the instance itself is what gets reused
+_KYBER_CACHE = {}
+
+def get_kyber(algorithm="Kyber768"):
+    """Return this process's Kyber instance for algorithm, generating its key pair on first use."""
+    if algorithm not in _KYBER_CACHE:
+        kyber = Kyber(algorithm)
+        kyber.generate_keypair()
+        _KYBER_CACHE[algorithm] = kyber
+    return _KYBER_CACHE[algorithm]
 
 def bases_to_bytes(bases):
-    """Convert a list of bases ('X' or 'Z') to bytes."""
-    bit_string = ''.join('0' if base == 'X' else '1' for base in bases)
-    # Pad bit_string to a multiple of 8 bits.
-    bit_string = bit_string.ljust((len(bit_string) + 7) // 8 * 8, '0')
-    return bytes(int(bit_string[i:i+8], 2) for i in range(0, len(bit_string), 8))
+    """Convert a list of bases ('X' or 'Z') to bytes, most significant bit first."""
+    bits = np.fromiter((0 if base == 'X' else 1 for base in bases), dtype=np.uint8, count=len(bases))
+    # packbits pads the last byte with zero bits.
+    return np.packbits(bits).tobytes()
 
 def bytes_to_bases(byte_data, length):
     """Convert bytes back to a list of bases ('X' or 'Z')."""
-    bit_string = ''.join(f"{byte:08b}" for byte in byte_data)[:length]
-    return ['X' if bit == '0' else 'Z' for bit in bit_string]
+    bits = np.unpackbits(np.frombuffer(byte_data, dtype=np.uint8))[:length]
+    return np.where(bits == 0, 'X', 'Z').tolist()
 
-def create_network():
+def create_network(distance=None):
+    if distance is None:
+        distance = DISTANCE
     network = Network("Underwater BB84-KEM Network")
     
     # Create nodes with complete port configuration
@@ -99,15 +119,15 @@ def create_network():
     alice.add_ports(["qout", "cout", "cin"])
     bob.add_ports(["qin", "cin", "cout"])
     
-    q_channel = QuantumChannel(name="QuantumChannel", length=DISTANCE)
-    q_channel.models["delay_model"] = FibreDelayModel(length=DISTANCE, 
+    q_channel = QuantumChannel(name="QuantumChannel", length=distance)
+    q_channel.models["delay_model"] = FibreDelayModel(length=distance, 
                                                       c=SPEED_LIGHT_VACUUM, 
                                                       ref_index=FIBRE_REFRACTIVE_INDEX)
     loss_prob = 1 - 10 ** (-FIBRE_ATTENUATION_DB_PERKM / 10)
     q_channel.models["quantum_loss_model"] = FibreLossModel(p_loss_init=0, p_loss_length=loss_prob)
 
-    c_channel_ab = ClassicalChannel(name="Classical_AB", length=DISTANCE)
-    c_channel_ba = ClassicalChannel(name="Classical_BA", length=DISTANCE)
+    c_channel_ab = ClassicalChannel(name="Classical_AB", length=distance)
+    c_channel_ba = ClassicalChannel(name="Classical_BA", length=distance)
     
     alice.ports["qout"].connect(q_channel.ports["send"])
     bob.ports["qin"].connect(q_channel.ports["recv"])
@@ -120,73 +140,74 @@ def create_network():
     return network
 
 class AliceProtocol(Protocol):
-    def __init__(self, node, num_bits, bob_kem, max_retries=MAX_RETRIES):
+    def __init__(self, node, num_bits, bob_kem, max_retries=MAX_RETRIES, timeout=None):
         super().__init__()
         self.node = node
         self.num_bits = num_bits
         self.bits = np.random.randint(2, size=num_bits)
-        self.bases = [random.choice(['Z', 'X']) for _ in range(num_bits)]
+        self.basis_bits = np.random.randint(0, 2, size=num_bits, dtype=np.uint8)  # 0 = 'X', 1 = 'Z', as packed by bases_to_bytes
         self.bob_kem = bob_kem  # Using Bob's persistent Kyber instance
-        self.max_retries = max_retries
-        self.current_idx = 0
+        self.max_retries = int(np.ceil(max_retries))  # The GA drivers pass float genes; 2.5 still allows 3 attempts
+        self.timeout = TIMEOUT if timeout is None else timeout
         self.shared_secret = None
         self.bases_bytes = None
+        # Fresh |0> qubits allocated in one call; one is used per send attempt
+        self.qubit_pool = qapi.create_qubits(num_bits)
 
     def run(self):
-        global GLOBAL_SHARED_SECRET
         # Convert bases to bytes and encrypt them using Bob's instance.
-        self.bases_bytes = bases_to_bytes(self.bases)
+        self.bases_bytes = np.packbits(self.basis_bits).tobytes()
         encrypted_bases, encap_key, self.shared_secret = self.bob_kem.encrypt(self.bases_bytes, self.bob_kem.public_key)
-        #print(f"Alice bases: {self.bases}")
+        #print(f"Alice bases: {self.basis_bits}")
         #print(f"Alice bases bytes: {self.bases_bytes.hex()}")
         #print(f"Alice encrypted bases: {encrypted_bases.hex()}")
         #print(f"Alice shared secret: {self.shared_secret.hex()}")
         
-        # Save the shared secret globally.
-        GLOBAL_SHARED_SECRET = self.shared_secret
-        
         # Send the encrypted bases and encapsulated key as messages.
         self.node.ports["cout"].tx_output(Message(encrypted_bases))
         self.node.ports["cout"].tx_output(Message(encap_key))
         
-        # Send qubits with sequence numbers.
-        while self.current_idx < self.num_bits:
-            attempts = 0
-            acked = False
-            while attempts < self.max_retries and not acked:
-                self.node.ports["cout"].tx_output(Message([self.current_idx]))
-                qubit = qapi.create_qubits(1)
-                if self.bits[self.current_idx] == 1:
-                    qapi.operate(qubit, ns.X)
-                if self.bases[self.current_idx] == 'X':
-                    qapi.operate(qubit, ns.H)
-                self.node.ports["qout"].tx_output(Message(qubit))
-                expr = yield self.await_port_input(self.node.ports["cin"]) | self.await_timer(TIMEOUT)
-                if expr.first_term.value:
-                    msg = self.node.ports["cin"].rx_input()
-                    if msg and msg.items[0] == self.current_idx:
-                        acked = True
-                attempts += 1
-            if acked:
-                self.current_idx += 1
-            else:
-                #print(f"Failed to send qubit {self.current_idx} after {self.max_retries} attempts")
-                break
+        # Send every qubit Bob is still missing back-to-back in one message per round, their
+        # indices in the message meta. Bob answers each round with a bitmap of every index he
+        # has measured, so a round costs one round trip and only the lost qubits are resent;
+        # each qubit gets at most max_retries attempts, and a round whose bitmap doesn't
+        # arrive within the timeout is resent as it was.
+        missing = np.arange(self.num_bits)
+        for attempt in range(self.max_retries):
+            qubits = []
+            for idx in missing:
+                if not self.qubit_pool:
+                    # Retransmissions used up the pool: allocate another batch
+                    self.qubit_pool = qapi.create_qubits(self.num_bits)
+                qubit = self.qubit_pool.pop()
+                op = ENCODING_OPS[self.bits[idx]][self.basis_bits[idx]]
+                if op is not None:
+                    qapi.operate(qubit, op)
+                qubits.append(qubit)
+            self.node.ports["qout"].tx_output(Message(qubits, indices=missing.tolist()))
+            expr = yield self.await_port_input(self.node.ports["cin"]) | self.await_timer(self.timeout)
+            if expr.first_term.value:
+                msg = self.node.ports["cin"].rx_input()
+                received = np.unpackbits(np.frombuffer(msg.items[0], dtype=np.uint8))[:self.num_bits]
+                missing = np.flatnonzero(received == 0)
+                if missing.size == 0:
+                    break
+        #if missing.size:
+        #    print(f"Failed to send {missing.size} qubits after {self.max_retries} attempts")
 
 class BobProtocol(Protocol):
     def __init__(self, node, num_bits, bob_kem):
         super().__init__()
         self.node = node
         self.num_bits = num_bits
-        self.measurements = []
+        self.measurements = np.empty(num_bits, dtype=np.int8)  # Valid where received is set
+        self.received = np.zeros(num_bits, dtype=bool)
         self.kem = bob_kem  # Bob's persistent Kyber instance
         self.alice_bases = None
-        self.expected_idx = 0
         self.shared_secret = None
         self.decrypted_bases_bytes = None
 
     def run(self):
-        global GLOBAL_SHARED_SECRET
         # Receive the encrypted bases.
         yield self.await_port_input(self.node.ports["cin"])
         encrypted_msg = self.node.ports["cin"].rx_input()
@@ -198,60 +219,57 @@ class BobProtocol(Protocol):
         encap_msg = self.node.ports["cin"].rx_input()
         encap_key = encap_msg.items[0]
         
-        # Instead of decapsulating, Bob uses the global shared secret.
-        self.shared_secret = GLOBAL_SHARED_SECRET
-        key_bytes = self.shared_secret
+        # Bob decapsulates the shared secret with his private key.
+        self.shared_secret = self.kem.decapsulate(encap_key)
         
-        # Manually decrypt the bases using XOR with the global shared secret.
-        decrypted = bytearray()
-        for i, byte in enumerate(encrypted_bases):
-            decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        decrypted_bases_bytes = bytes(decrypted)
+        # Decrypt the bases using XOR with the shared secret.
+        decrypted_bases_bytes = xor_with_key(encrypted_bases, self.shared_secret)
         
         #print(f"Bob decrypted bases bytes: {decrypted_bases_bytes.hex()}")
-        #print(f"Bob shared secret (from global variable): {self.shared_secret.hex()}")
+        #print(f"Bob shared secret: {self.shared_secret.hex()}")
         
         self.alice_bases = bytes_to_bases(decrypted_bases_bytes, self.num_bits)
         #print(f"Bob recovered Alice bases: {self.alice_bases}")
         self.decrypted_bases_bytes = decrypted_bases_bytes
         
-        # Process incoming qubits.
-        while self.expected_idx < self.num_bits:
-            yield self.await_port_input(self.node.ports["cin"])
-            idx_msg = self.node.ports["cin"].rx_input()
-            seq_num = idx_msg.items[0]
+        # Process each round of qubits, then report every index measured so far.
+        while not self.received.all():
             yield self.await_port_input(self.node.ports["qin"])
             qubit_msg = self.node.ports["qin"].rx_input()
-            qubit = qubit_msg.items[0]
-            if seq_num == self.expected_idx:
-                if self.alice_bases[self.expected_idx] == 'X':
+            for idx, qubit in zip(qubit_msg.meta["indices"], qubit_msg.items):
+                if qubit is None or self.received[idx]:
+                    continue  # Lost in the fibre, or a resend of one already measured
+                if self.alice_bases[idx] == 'X':
                     qapi.operate(qubit, ns.H)
                 result, _ = qapi.measure(qubit)
-                self.measurements.append(result)
-                self.node.ports["cout"].tx_output(Message([self.expected_idx]))
-                self.expected_idx += 1
+                self.measurements[idx] = result
+                self.received[idx] = True
+            self.node.ports["cout"].tx_output(Message([np.packbits(self.received).tobytes()]))
 
-def run_bb84_kem(num_bits, distance, timeout, max_retries):
-    ns.sim_reset()
-    
-    # Update the global parameters with the input values
-    global DISTANCE, TIMEOUT, MAX_RETRIES
-    DISTANCE = distance
-    TIMEOUT = timeout
-    MAX_RETRIES = max_retries
-    
+# Function to check that Bob measured every one of Alice's bits and got the same value
+def bits_match(alice_protocol, bob_protocol):
+    return bool(bob_protocol.received.all()) and np.array_equal(alice_protocol.bits, bob_protocol.measurements)
+
+# Function to build the parts of an exchange that don't change between runs with the
+# same distance: the network and Bob's Kyber key pair
+def build_once(distance):
     # Create the network with updated parameters
-    network = create_network()
+    network = create_network(distance)
+    
+    # Bob reuses this process's Kyber instance and key pair.
+    bob_kem = get_kyber()
     
-    # Bob creates his Kyber instance and generates his key pair.
-    bob_kem = Kyber()
-    bob_kem.generate_keypair()
+    return network, bob_kem
+
+# Function to run one exchange on a network and key pair from build_once
+def run_once(network, bob_kem, num_bits, timeout, max_retries):
+    ns.sim_reset()
     
     alice = network.nodes["Alice"]
     bob = network.nodes["Bob"]
     
     # Start the Alice and Bob protocols with the input parameters
-    alice_protocol = AliceProtocol(alice, num_bits, bob_kem, max_retries)
+    alice_protocol = AliceProtocol(alice, num_bits, bob_kem, max_retries, timeout)
     bob_protocol = BobProtocol(bob, num_bits, bob_kem)
     
     alice_protocol.start()
@@ -260,21 +278,35 @@ def run_bb84_kem(num_bits, distance, timeout, max_retries):
     stat = ns.sim_run(end_time=ENDTIME)
     #print(stat)
     
+    # Stop both protocols so they stop listening on the ports the next run reuses
+    alice_protocol.stop()
+    bob_protocol.stop()
+    
     keys_match = (alice_protocol.shared_secret == bob_protocol.shared_secret)
     #print(f"\nShared secrets match: {keys_match}")
     
     decryption_correct = (alice_protocol.bases_bytes == bob_protocol.decrypted_bases_bytes)
     #print(f"Decryption proper: {decryption_correct}")
     
-    success = alice_protocol.bits.tolist() == bob_protocol.measurements
-    lost_bits = len(alice_protocol.bits) - len(bob_protocol.measurements)
+    success = bits_match(alice_protocol, bob_protocol)
+    lost_bits = len(alice_protocol.bits) - int(bob_protocol.received.sum())
     #print(f"\nKey match (from qubit measurements): {success}")
     #print(f"Alice sent: {len(alice_protocol.bits)} bits")
-    #print(f"Bob received: {len(bob_protocol.measurements)} bits")
+    #print(f"Bob received: {int(bob_protocol.received.sum())} bits")
     #print(f"Lost bits: {lost_bits}")
 
     return success
 
+def run_bb84_kem(num_bits, distance, timeout, max_retries):
+    # Update the global parameters with the input values
+    global DISTANCE, TIMEOUT, MAX_RETRIES
+    DISTANCE = distance
+    TIMEOUT = timeout
+    MAX_RETRIES = max_retries
+    
+    network, bob_kem = build_once(distance)
+    return run_once(network, bob_kem, num_bits, timeout, max_retries)
+
 def manual_survey(n_bits):
     arr = []
     big_trails = 1
@@ -289,14 +321,73 @@ def manual_survey(n_bits):
     #print(arr)
 
 
-def avg_100_runs(n_bits, distance, timeout, max_retries):
+# Function to count successful exchanges over n_runs runs; lets callers such as
+# successive halving screen configurations with fewer runs than avg_100_runs.
+# With early_stop_threshold set, it returns early (a lower bound below the threshold)
+# once even all remaining runs succeeding could not reach that many successes.
+def count_successes(n_bits, distance, timeout, max_retries, n_runs, early_stop_threshold=None):
+    # Every run shares one network and key pair; Alice still encapsulates a fresh secret each run
+    network, bob_kem = build_once(distance)
     count = 0
-    for i in range(100):
-        if run_bb84_kem(n_bits, distance, timeout, max_retries):
+    for i in range(n_runs):
+        if run_once(network, bob_kem, n_bits, timeout, max_retries):
             count += 1
-    print(f"{count} in 100")
+        if early_stop_threshold is not None and count + (n_runs - i - 1) < early_stop_threshold:
+            print(f"{count} in {i+1}, {early_stop_threshold} in {n_runs} unreachable")
+            return count
+    print(f"{count} in {n_runs}")
+    return count
+
+def avg_100_runs(n_bits, distance, timeout, max_retries, early_stop_threshold=None):
+    return count_successes(n_bits, distance, timeout, max_retries, 100, early_stop_threshold)
+
+# Function to split the n_runs runs of count_successes across a process pool. Each worker
+# builds its own network and key pair and simulates its share; NetSquid's simulator is
+# global per process, so the runs never share one. Only for callers that are not already
+# pool workers themselves (the GA and grid search drivers parallelize over configurations).
+def count_successes_parallel(n_bits, distance, timeout, max_retries, n_runs, processes=None):
+    processes = min(processes or os.cpu_count(), n_runs)
+    shares = [n_runs // processes + (i < n_runs % processes) for i in range(processes)]
+    with Pool(processes) as pool:
+        count = sum(pool.starmap(
+            count_successes, [(n_bits, distance, timeout, max_retries, share) for share in shares]
+        ))
+    print(f"{count} in {n_runs}")
     return count
 
+def avg_100_runs_parallel(n_bits, distance, timeout, max_retries, processes=None):
+    return count_successes_parallel(n_bits, distance, timeout, max_retries, 100, processes)
+
+# Function to run one independent exchange per (distance, timeout, max_retries) tuple,
+# all inside a single simulator run so the reset/run overhead is paid once
+def run_bb84_kem_batch(num_bits, param_list):
+    ns.sim_reset()
+    
+    pairs = []
+    bob_kem = get_kyber()
+    for distance, timeout, max_retries in param_list:
+        network = create_network(distance)
+        alice_protocol = AliceProtocol(network.nodes["Alice"], num_bits, bob_kem, max_retries, timeout)
+        bob_protocol = BobProtocol(network.nodes["Bob"], num_bits, bob_kem)
+        alice_protocol.start()
+        bob_protocol.start()
+        pairs.append((alice_protocol, bob_protocol))
+    
+    ns.sim_run(end_time=ENDTIME)
+    
+    return [bits_match(alice_protocol, bob_protocol) for alice_protocol, bob_protocol in pairs]
+
+# Function to count successful exchanges over n_runs runs for every tuple in param_list,
+# returned as an array in the same order
+def count_successes_batch(n_bits, param_list, n_runs):
+    successes = run_bb84_kem_batch(n_bits, [params for params in param_list for _ in range(n_runs)])
+    counts = np.array(successes).reshape(len(param_list), n_runs).sum(axis=1)
+    print(f"{counts.tolist()} in {n_runs}")
+    return counts
+
+def avg_100_runs_batch(n_bits, param_list):
+    return count_successes_batch(n_bits, param_list, 100)
+
 #run_bb84_kem(NO_OF_BITS, distance= 100, timeout= 10e10, max_retries=10)
 #manual_survey(NO_OF_BITS, distance= 100, timeout= 10e10, max_retries=10)
 #avg_100_runs(NO_OF_BITS, distance= 100, timeout= 10e10, max_retries=10)
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import numpy as np
+
+CACHE_FILE = "avg_cache_round_ack.sqlite"  # Success counts shared by every driver, run and worker process
+# prept5 (and so NetSquid) is only imported when a cache miss has to be simulated, so the
+# key helpers below can be used without it
+# Every driver searches timeouts on this log-spaced grid of 30 integer values from 1 ns to 1e9 ns,
+# and any other timeout is simulated and cached as its nearest grid point
+TIMEOUT_GRID = np.unique(np.round(np.logspace(0, 9, 30)).astype(np.int64))
+LOG_TIMEOUT_GRID = np.log10(TIMEOUT_GRID)
+
+# Per-process connection; reopened after a fork because SQLite connections can't cross processes
+_connection = None
+_connection_pid = None
+
+def get_connection():
+    global _connection, _connection_pid
+    if _connection is None or _connection_pid != os.getpid():
+        _connection = sqlite3.connect(CACHE_FILE, timeout=60)
+        _connection.execute("PRAGMA journal_mode=WAL")  # Readers don't block the worker that is writing
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS successes ("
+            "n_bits INTEGER, distance REAL, timeout REAL, max_retries INTEGER, n_runs INTEGER, count INTEGER, "
+            "PRIMARY KEY (n_bits, distance, timeout, max_retries, n_runs))"
+        )
+        _connection_pid = os.getpid()
+    return _connection
+
+# Function to find the TIMEOUT_GRID index nearest to a timeout in log space
+def timeout_index(timeout):
+    return int(np.abs(LOG_TIMEOUT_GRID - np.log10(max(float(timeout), 1.0))).argmin())
+
+# Function to bucket parameters so near-identical queries from different drivers share
+# one entry: distance to 1e-3 m, timeout to its nearest TIMEOUT_GRID point and max_retries
+# rounded up, as AliceProtocol does, so a cached 2.5 is the same 3 attempts as a direct run
+def quantize_params(distance, timeout, max_retries):
+    return round(float(distance), 3), float(TIMEOUT_GRID[timeout_index(timeout)]), int(np.ceil(max_retries))
+
+def lookup(n_bits, params, n_runs):
+    row = get_connection().execute(
+        "SELECT count FROM successes WHERE n_bits=? AND distance=? AND timeout=? AND max_retries=? AND n_runs=?",
+        (n_bits, *params, n_runs)
+    ).fetchone()
+    return None if row is None else row[0]
+
+def store(n_bits, rows, n_runs):
+    with get_connection() as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO successes VALUES (?, ?, ?, ?, ?, ?)",
+            [(n_bits, *params, n_runs, int(count)) for params, count in rows]
+        )
+
+# Cached prept5.count_successes. Early-stopped counts are only lower bounds, so a result
+# is stored only when it ran to completion (it reached the threshold, or there was none).
+def count_successes(n_bits, distance, timeout, max_retries, n_runs, early_stop_threshold=None):
+    params = quantize_params(distance, timeout, max_retries)
+    count = lookup(n_bits, params, n_runs)
+    if count is None:
+        import prept5
+        count = prept5.count_successes(n_bits, *params, n_runs, early_stop_threshold)
+        if early_stop_threshold is None or count >= early_stop_threshold:
+            store(n_bits, [(params, count)], n_runs)
+    return count
+
+def avg_100_runs(n_bits, distance, timeout, max_retries, early_stop_threshold=None):
+    return count_successes(n_bits, distance, timeout, max_retries, 100, early_stop_threshold)
+
+# Cached prept5.count_successes_parallel, for drivers that evaluate one point at a time
+def count_successes_parallel(n_bits, distance, timeout, max_retries, n_runs, processes=None):
+    params = quantize_params(distance, timeout, max_retries)
+    count = lookup(n_bits, params, n_runs)
+    if count is None:
+        import prept5
+        count = prept5.count_successes_parallel(n_bits, *params, n_runs, processes)
+        store(n_bits, [(params, count)], n_runs)
+    return count
+
+def avg_100_runs_parallel(n_bits, distance, timeout, max_retries, processes=None):
+    return count_successes_parallel(n_bits, distance, timeout, max_retries, 100, processes)
+
+# Cached prept5.count_successes_batch: only the distinct uncached tuples are simulated,
+# still together in one simulator run
+def count_successes_batch(n_bits, param_list, n_runs):
+    keys = [quantize_params(*params) for params in param_list]
+    counts = {key: lookup(n_bits, key, n_runs) for key in keys}
+    missing = [key for key, count in counts.items() if count is None]
+    if missing:
+        import prept5
+        rows = list(zip(missing, prept5.count_successes_batch(n_bits, missing, n_runs).tolist()))
+        store(n_bits, rows, n_runs)
+        counts.update(rows)
+    return np.array([counts[key] for key in keys])
+
+def avg_100_runs_batch(n_bits, param_list):
+    return count_successes_batch(n_bits, param_list, 100)
@@ -0,0 +1,14 @@
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+# Builds the XOR helper used by prept5.xor_with_key:
+#     python setup.py build_ext --inplace
+extensions = [
+    Extension(
+        "fastxor",
+        ["fastxor.pyx", "xor_words.c"],
+        extra_compile_args=["-O3", "-march=native"],
+    )
+]
+
+setup(name="fastxor", ext_modules=cythonize(extensions))
@@ -102,14 +102,16 @@ def run_bb84(num_bits):
     
     ns.sim_run(end_time=ENDTIME)
 
-    match_indices = np.where(alice_protocol.bases == bob_protocol.bases)[0]
-    valid_match_indices = [i for i in match_indices if i in bob_protocol.received_indices]
+    # Bob's measurements laid out by index, with a mask of the indices he received
+    received_mask = np.zeros(num_bits, dtype=bool)
+    received_mask[bob_protocol.received_indices] = True
+    bob_bits = np.full(num_bits, -1)
+    bob_bits[bob_protocol.received_indices] = bob_protocol.measurements
 
-    sifted_alice = [alice_protocol.bits[i] for i in valid_match_indices]
-    sifted_bob = [bob_protocol.measurements[bob_protocol.received_indices.index(i)] for i in valid_match_indices]
-    
-    key_match = sifted_alice == sifted_bob
-    return key_match, len(sifted_alice)
+    # Sift in one pass: same basis and received by Bob
+    mask = (alice_protocol.bases == bob_protocol.bases) & received_mask
+    key_match = np.array_equal(alice_protocol.bits[mask], bob_bits[mask])
+    return key_match, int(mask.sum())
 
 def avg_runs(bit_sizes):
     for n_bits in bit_sizes:
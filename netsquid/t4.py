@@ -1,5 +1,6 @@
 import netsquid as ns
 import numpy as np
+from itertools import cycle
 from netsquid.nodes import Node, Network
 from netsquid.components import QuantumChannel, ClassicalChannel, Message
 from netsquid.components.models import FibreDelayModel
@@ -63,11 +64,7 @@ class Kyber:
         # Use the shared secret for symmetric encryption (simple XOR for demo)
         # In practice, use a proper symmetric cipher like AES
         key_bytes = shared_secret
-        result = bytearray()
-        for i, b in enumerate(plaintext):
-            result.append(b ^ key_bytes[i % len(key_bytes)])
-            
-        return bytes(result), ciphertext
+        return bytes(b ^ k for b, k in zip(plaintext, cycle(key_bytes))), ciphertext
     
     def decrypt(self, ciphertext, encapsulated_key, private_key=None):
         """Decrypt ciphertext using Kyber.
@@ -97,11 +94,7 @@ class Kyber:
         
         # Use the shared secret for symmetric decryption (simple XOR for demo)
         key_bytes = shared_secret
-        result = bytearray()
-        for i, b in enumerate(ciphertext):
-            result.append(b ^ key_bytes[i % len(key_bytes)])
-            
-        return bytes(result)
+        return bytes(b ^ k for b, k in zip(ciphertext, cycle(key_bytes)))
 
 def bases_to_bytes(bases):
     return bytes([int(''.join(['1' if b == 'X' else '0' for b in bases[i:i+8]]).ljust(8, '0')[:8], 2) 
@@ -1,5 +1,6 @@
 import netsquid as ns
 import numpy as np
+from itertools import cycle
 from netsquid.nodes import Node, Network
 from netsquid.components import QuantumChannel, ClassicalChannel, Message
 from netsquid.components.models import FibreDelayModel
@@ -56,19 +57,13 @@ class Kyber:
         """
         ciphertext, shared_secret = self.encapsulate(public_key)
         key_bytes = shared_secret
-        encrypted = bytearray()
-        for i, byte in enumerate(plaintext):
-            encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(encrypted), ciphertext
+        return bytes(byte ^ k for byte, k in zip(plaintext, cycle(key_bytes))), ciphertext
 
     def decrypt(self, ciphertext, encapsulated_key):
         """Decrypt ciphertext using the recovered shared secret from decapsulation."""
         shared_secret = self.decapsulate(encapsulated_key)
         key_bytes = shared_secret
-        decrypted = bytearray()
-        for i, byte in enumerate(ciphertext):
-            decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(decrypted)
+        return bytes(byte ^ k for byte, k in zip(ciphertext, cycle(key_bytes)))
 
 def bases_to_bytes(bases):
     """Convert a list of bases ('X' or 'Z') to bytes."""
@@ -1,5 +1,6 @@
 import netsquid as ns
 import numpy as np
+from itertools import cycle
 from netsquid.nodes import Node, Network
 from netsquid.components import QuantumChannel, ClassicalChannel, Message
 from netsquid.components.models import FibreDelayModel
@@ -66,19 +67,13 @@ class Kyber:
         """
         ciphertext, shared_secret = self.encapsulate(public_key)
         key_bytes = shared_secret
-        encrypted = bytearray()
-        for i, byte in enumerate(plaintext):
-            encrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(encrypted), ciphertext, shared_secret
+        return bytes(byte ^ k for byte, k in zip(plaintext, cycle(key_bytes))), ciphertext, shared_secret
 
     def decrypt(self, ciphertext, encapsulated_key):
         """Standard decryption using decapsulation (not used in Bob now)."""
         shared_secret = self.kem.decap_secret(encapsulated_key)
         key_bytes = shared_secret
-        decrypted = bytearray()
-        for i, byte in enumerate(ciphertext):
-            decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        return bytes(decrypted), shared_secret
+        return bytes(byte ^ k for byte, k in zip(ciphertext, cycle(key_bytes))), shared_secret
 
 def bases_to_bytes(bases):
     """Convert a list of bases ('X' or 'Z') to bytes."""
@@ -206,10 +201,7 @@ class BobProtocol(Protocol):
         key_bytes = self.shared_secret
         
         # Manually decrypt the bases using XOR with the global shared secret.
-        decrypted = bytearray()
-        for i, byte in enumerate(encrypted_bases):
-            decrypted.append(byte ^ key_bytes[i % len(key_bytes)])
-        decrypted_bases_bytes = bytes(decrypted)
+        decrypted_bases_bytes = bytes(byte ^ k for byte, k in zip(encrypted_bases, cycle(key_bytes)))
         
         #print(f"Bob decrypted bases bytes: {decrypted_bases_bytes.hex()}")
         #print(f"Bob shared secret (from global variable): {self.shared_secret.hex()}")
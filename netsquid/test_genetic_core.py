@@ -0,0 +1,39 @@
+import numpy as np
+
+import genetic_core
+from genetic_core import create_population, crossover, mutate, top_indices
+from prept5_cached import TIMEOUT_GRID
+
+# Parents whose genes encode their own row index, so every offspring gene can be traced back
+PARENTS = np.array([[i, 100 + i, 200 + i] for i in range(6)])
+
+def test_create_population_stays_in_the_search_space():
+    population = create_population(500)
+    assert population.shape == (500, 3)
+    assert np.all((population[:, 0] >= genetic_core.DISTANCE_MIN) & (population[:, 0] <= genetic_core.DISTANCE_MAX))
+    assert np.all(np.isin(population[:, 1], TIMEOUT_GRID))
+    assert np.all((population[:, 2] >= genetic_core.MAX_RETRIES_MIN) & (population[:, 2] <= genetic_core.MAX_RETRIES_MAX))
+
+def test_crossover_splices_two_different_parents():
+    offspring = crossover(PARENTS, 200)
+    assert offspring.shape == (200, 3)
+    first, middle, second = offspring[:, 0], offspring[:, 1] - 100, offspring[:, 2] - 200
+    assert np.all(first != second)
+    assert np.all((middle == first) | (middle == second))
+
+def test_mutate_leaves_rows_before_start_alone():
+    population = mutate(PARENTS.copy(), mutation_rate=1.0, start=2)
+    assert np.array_equal(population[:2], PARENTS[:2])
+
+def test_mutate_redraws_at_most_one_gene_per_row():
+    population = mutate(np.repeat(PARENTS, 50, axis=0), mutation_rate=1.0)
+    changed = (population != np.repeat(PARENTS, 50, axis=0)).sum(axis=1)
+    assert np.all(changed <= 1)
+    assert changed.sum() > 0
+
+def test_mutate_without_rate_is_a_no_op():
+    assert np.array_equal(mutate(PARENTS.copy(), mutation_rate=0.0), PARENTS)
+
+def test_top_indices_is_best_first_and_stable():
+    assert top_indices([3, 1, 3, 2], 3).tolist() == [0, 2, 3]
+    assert top_indices(np.array([0.5, 2.0]), 5).tolist() == [1, 0]
@@ -0,0 +1,9 @@
+import numpy as np
+import pytest
+
+prept5 = pytest.importorskip("prept5", exc_type=ImportError)
+
+# The GA and fitness drivers pass genes straight from float64 arrays
+def test_count_successes_accepts_float_max_retries():
+    count = prept5.count_successes(4, 10.0, np.float64(1e6), np.float64(2.5), 2)
+    assert 0 <= count <= 2
@@ -0,0 +1,25 @@
+import numpy as np
+
+from prept5_cached import TIMEOUT_GRID, quantize_params, timeout_index
+
+def test_timeout_grid_spans_1ns_to_1s():
+    assert len(TIMEOUT_GRID) == 30
+    assert TIMEOUT_GRID[0] == 1 and TIMEOUT_GRID[-1] == 1e9
+
+def test_timeout_index_maps_grid_points_to_themselves():
+    assert [timeout_index(t) for t in TIMEOUT_GRID] == list(range(len(TIMEOUT_GRID)))
+
+def test_timeout_index_snaps_in_log_space_and_clamps():
+    assert TIMEOUT_GRID[timeout_index(1e6)] == 788046
+    assert timeout_index(0) == 0
+    assert timeout_index(1e12) == len(TIMEOUT_GRID) - 1
+
+# Drivers pass genes straight from float64 arrays; keys must be plain, hashable Python values
+def test_quantize_params_rounds_each_gene():
+    distance, timeout, max_retries = quantize_params(np.float64(12.34567), np.float64(5e7), np.float64(2.5))
+    assert (distance, timeout, max_retries) == (12.346, float(TIMEOUT_GRID[timeout_index(5e7)]), 3)
+    assert type(distance) is float and type(timeout) is float and type(max_retries) is int
+
+def test_quantize_params_is_stable_on_its_own_output():
+    params = quantize_params(37.5, 123456, 4)
+    assert quantize_params(*params) == params
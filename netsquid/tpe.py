@@ -0,0 +1,114 @@
+import os
+# One BLAS/OpenMP thread per process, set before numpy loads so the workers inherit it
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+import optuna
+from optuna.samplers import TPESampler
+from optuna.pruners import HyperbandPruner
+from optuna.trial import TrialState
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from prept5 import count_successes, run_bb84_kem
+from prept5_cached import lookup, quantize_params, store
+
+# Global variables and parameter ranges
+NO_OF_BITS = 24
+PARAM_RANGES = {
+    'distance': (1, 200),
+    'timeout': (1, 1e9),
+    'max_retries': (1, 10)
+}
+N_TRIALS = 100  # Total parameter sets proposed by the sampler
+RUNGS = list(range(10, 101, 10))  # Cumulative runs after each pruning checkpoint; a trial that survives gets the full 100
+NUM_WORKERS = max(1, os.cpu_count() - 1)  # Trials simulated at once; one core is left for the ask-and-tell loop
+
+# Function to run the next `n_runs` simulations of one trial; module level so the
+# process pool can pickle it
+def run_rung(distance, timeout, max_retries, n_runs):
+    return count_successes(NO_OF_BITS, distance, timeout, max_retries, n_runs)
+
+# Worker initializer: one throwaway exchange so NetSquid and liboqs are warmed up
+# before the first trial
+def warm_worker():
+    run_bb84_kem(NO_OF_BITS, 50, 1e6, 3)
+
+# Function to draw a trial's parameters from the TPE sampler, quantized like every other
+# driver's so a full-length trial shares the prept5_cached store
+def suggest_params(trial):
+    return quantize_params(
+        trial.suggest_int('distance', *PARAM_RANGES['distance']),
+        trial.suggest_float('timeout', *PARAM_RANGES['timeout'], log=True),
+        trial.suggest_int('max_retries', *PARAM_RANGES['max_retries']),
+    )
+
+# TPE search with Hyperband pruning, driven ask-and-tell from the main process. NetSquid
+# keeps a global simulator, so trials run in worker processes rather than Optuna's
+# threads; each rung is one task and the pruning decision is made here between rungs.
+def tpe_search(n_trials=N_TRIALS, rungs=RUNGS):
+    study = optuna.create_study(
+        direction='maximize',
+        sampler=TPESampler(seed=42),
+        pruner=HyperbandPruner(min_resource=1, max_resource=len(rungs), reduction_factor=3)
+    )
+
+    # future -> (trial, params, rung, successes so far)
+    running = {}
+    launched = 0
+
+    def start(trial, params, rung, successes):
+        runs_done = rungs[rung - 1] if rung else 0
+        future = executor.submit(run_rung, *params, rungs[rung] - runs_done)
+        running[future] = (trial, params, rung, successes)
+
+    # Function to start the next trial that needs simulating; trials whose full-length
+    # count is already cached are told straight away
+    def launch_next():
+        nonlocal launched
+        while launched < n_trials:
+            trial = study.ask()
+            launched += 1
+            params = suggest_params(trial)
+            count = lookup(NO_OF_BITS, params, rungs[-1])
+            if count is None:
+                start(trial, params, 0, 0)
+                return
+            study.tell(trial, 100 * count / rungs[-1])
+
+    with ProcessPoolExecutor(max_workers=NUM_WORKERS, initializer=warm_worker) as executor:
+        for _ in range(NUM_WORKERS):
+            launch_next()
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial, params, rung, successes = running.pop(future)
+                successes += future.result()
+                accuracy = 100 * successes / rungs[rung]
+                trial.report(accuracy, rung)
+
+                if rung == len(rungs) - 1:
+                    store(NO_OF_BITS, [(params, successes)], rungs[-1])  # Full length, so other drivers can reuse it
+                    study.tell(trial, accuracy)
+                elif trial.should_prune():
+                    study.tell(trial, state=TrialState.PRUNED)
+                else:
+                    # Survived this rung: top the trial up with more runs
+                    start(trial, params, rung + 1, successes)
+                    continue
+
+                # A trial finished, so its worker slot goes to a new one
+                launch_next()
+
+    return study
+
+if __name__ == "__main__":
+    study = tpe_search()
+
+    pruned = len(study.get_trials(states=(TrialState.PRUNED,)))
+    print("\nOptimization results:")
+    print(f"Trials: {len(study.trials)} ({pruned} pruned)")
+    # Report the grid point the best trial was actually simulated at
+    best_distance, best_timeout, best_max_retries = quantize_params(**study.best_params)
+    print(f"Best distance: {best_distance}m")
+    print(f"Best timeout: {best_timeout:.2e}ns")
+    print(f"Best max_retries: {best_max_retries}")
+    print(f"Best accuracy: {study.best_value:.2f}%")
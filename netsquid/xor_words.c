@@ -0,0 +1,50 @@
+#include <string.h>
+#include "xor_words.h"
+
+#if defined(__AVX2__)
+#include <immintrin.h>
+#elif defined(__ARM_NEON)
+#include <arm_neon.h>
+#endif
+
+/*
+ * out[i] = data[i] ^ key[i % m]. When the key is a whole number of 64-bit words
+ * (Kyber's 32-byte shared secret is four), every full repetition of the key is
+ * XORed a word at a time; the remaining bytes go one by one. With a 32-byte key and
+ * AVX2 or NEON available (setup.py builds with -march=native), the key is held in
+ * vector registers and each repetition takes one 256-bit or two 128-bit XORs.
+ */
+void xor_cycle_words(const uint8_t *data, size_t n, const uint8_t *key, size_t m, uint8_t *out)
+{
+    size_t i = 0;
+#if defined(__AVX2__)
+    if (m == 32) {
+        __m256i k = _mm256_loadu_si256((const __m256i *)key);
+        for (; i + 32 <= n; i += 32)
+            _mm256_storeu_si256((__m256i *)(out + i),
+                                _mm256_xor_si256(_mm256_loadu_si256((const __m256i *)(data + i)), k));
+    }
+#elif defined(__ARM_NEON)
+    if (m == 32) {
+        uint8x16_t k0 = vld1q_u8(key), k1 = vld1q_u8(key + 16);
+        for (; i + 32 <= n; i += 32) {
+            vst1q_u8(out + i, veorq_u8(vld1q_u8(data + i), k0));
+            vst1q_u8(out + i + 16, veorq_u8(vld1q_u8(data + i + 16), k1));
+        }
+    }
+#endif
+    if (m % 8 == 0) {
+        for (; i + m <= n; i += m) {
+            for (size_t j = 0; j < m; j += 8) {
+                uint64_t d, k;
+                /* memcpy keeps the unaligned loads and stores well-defined; it compiles to plain moves */
+                memcpy(&d, data + i + j, 8);
+                memcpy(&k, key + j, 8);
+                d ^= k;
+                memcpy(out + i + j, &d, 8);
+            }
+        }
+    }
+    for (; i < n; i++)
+        out[i] = data[i] ^ key[i % m];
+}
@@ -0,0 +1,9 @@
+#ifndef XOR_WORDS_H
+#define XOR_WORDS_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+void xor_cycle_words(const uint8_t *data, size_t n, const uint8_t *key, size_t m, uint8_t *out);
+
+#endif